@@ -0,0 +1,47 @@
+import csv
+import gzip
+import json
+import os
+
+ARCHIVE_FORMAT = 1
+
+
+def archive_path(directory, election):
+    """A new archive file name in ``directory`` for the election started at ``election``."""
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, election.strftime("%Y%m%dT%H%M%S"))
+    path, counter = f"{stem}.csv.gz", 0
+    # Archives are never overwritten; a rerun of the same cycle gets a suffix
+    while os.path.exists(path):
+        counter += 1
+        path = f"{stem}.{counter}.csv.gz"
+    return path
+
+
+def write_archive(path, header, rows):
+    """Write one election's archive: a JSON header line, then a CSV row per ballot.
+
+    Rows are ``(voter_id, nominee_id, ...)``, with the full ranking for
+    ranked ballots. The file is gzip-compressed, written to a temporary
+    name and renamed into place, so a finished archive is never partial.
+    """
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as raw:
+        with gzip.open(raw, "wt", encoding="utf-8", newline="", compresslevel=6) as f:
+            f.write(json.dumps({"format": ARCHIVE_FORMAT, **header}) + "\n")
+            csv.writer(f, lineterminator="\n").writerows(rows)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_file, path)
+
+
+def read_header(file):
+    header = json.loads(file.readline())
+    if header.get("format") != ARCHIVE_FORMAT:
+        raise ValueError(f"Unsupported archive format: {header.get('format')}")
+    return header
+
+
+def open_archive(path):
+    """Open an archive for streaming; read_header() first, then ballot lines."""
+    return gzip.open(path, "rt", encoding="utf-8", newline="")
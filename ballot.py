@@ -0,0 +1,70 @@
+import bisect
+
+import discord
+from discord import app_commands
+
+# Discord allows at most 25 options per select menu and 25 autocomplete choices
+PAGE_SIZE = 25
+MAX_CHOICES = 25
+# Labels, values and choice names are capped at 100 characters
+MAX_LABEL_LENGTH = 100
+
+
+class Ballot:
+    """Ballot structures precomputed once per voting round.
+
+    Holds the nominee list split into select-option pages and a sorted
+    prefix index over every word of each display name, so ballot pages and
+    ``/vote`` autocomplete are served without rebuilding anything.
+    """
+
+    def __init__(self, nominee_list):
+        self.nominees = tuple(nominee_list)
+        self.names = dict(self.nominees)
+        self.option_pages = tuple(
+            [
+                discord.SelectOption(
+                    label=name[:MAX_LABEL_LENGTH], value=str(nominee_id)
+                )
+                for nominee_id, name in self.nominees[start : start + PAGE_SIZE]
+            ]
+            for start in range(0, len(self.nominees), PAGE_SIZE)
+        )
+        self.choices = {
+            nominee_id: app_commands.Choice(
+                name=name[:MAX_LABEL_LENGTH], value=str(nominee_id)
+            )
+            for nominee_id, name in self.nominees
+        }
+
+        index = set()
+        for nominee_id, name in self.nominees:
+            folded = name.casefold()
+            # Every word start is a key, so "smi" finds "John Smith"
+            for position, character in enumerate(folded):
+                if position == 0 or (folded[position - 1] == " " and character != " "):
+                    index.add((folded[position:], nominee_id))
+        self._index = sorted(index)
+        self._keys = [key for key, _ in self._index]
+
+    @property
+    def page_count(self):
+        return len(self.option_pages)
+
+    def __contains__(self, nominee_id):
+        return nominee_id in self.names
+
+    def search(self, prefix, limit=MAX_CHOICES):
+        """Return up to ``limit`` autocomplete choices whose name matches ``prefix``."""
+        if not prefix:
+            return [self.choices[nominee_id] for nominee_id, _ in self.nominees[:limit]]
+        prefix = prefix.casefold()
+        matches = {}
+        position = bisect.bisect_left(self._keys, prefix)
+        while position < len(self._index) and len(matches) < limit:
+            key, nominee_id = self._index[position]
+            if not key.startswith(prefix):
+                break
+            matches.setdefault(nominee_id, self.choices[nominee_id])
+            position += 1
+        return list(matches.values())
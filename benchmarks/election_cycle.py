@@ -0,0 +1,513 @@
+"""Load-test a full election cycle against an in-process Discord stand-in.
+
+Runs a real ElectionBot with fake channel, guild, role, member and
+interaction objects in place of the gateway and REST layer, so no token or
+server is needed. Every REST call is counted per phase and delayed by a
+simulated round trip. The scheduler starts paused and runs on a virtual
+clock: each phase job is fired by hand once the clock has been moved to
+its run time. The cycle is open_nominations, concurrent /nominateme
+calls, close_nominations, start_voting, concurrent ballot interactions and
+end_voting. The report covers time-to-acknowledge, event-loop lag, REST
+calls per phase and result latency. Run from the repository root:
+
+    python -m benchmarks.election_cycle --nominees 50 --voters 20000
+"""
+
+import argparse
+import asyncio
+import collections
+import datetime
+import functools
+import importlib
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+from contextlib import contextmanager
+
+import discord
+from discord.ui.select import selected_values
+
+GUILD_ID = 1 << 40
+CHANNEL_ID = GUILD_ID + 1
+ROLE_ID = GUILD_ID + 2
+FIRST_MEMBER_ID = GUILD_ID + 1000
+# Sampling period of the event-loop lag monitor
+LAG_INTERVAL = 0.01
+
+
+def percentiles(samples, scale=1000):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(len(samples) * q))] * scale
+    return {
+        "count": len(samples),
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": samples[-1] * scale,
+    }
+
+
+class FakeRest:
+    """Counts REST calls per phase and sleeps for a simulated round trip."""
+
+    def __init__(self, latency, rng):
+        self.latency = latency
+        self.rng = rng
+        self.phase = "startup"
+        self.calls = collections.defaultdict(collections.Counter)
+        self._ids = itertools.count(GUILD_ID + 10_000_000)
+
+    def next_id(self):
+        return next(self._ids)
+
+    async def call(self, route):
+        self.calls[self.phase][route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+
+
+class FakeMember:
+    def __init__(self, member_id, rest):
+        self.id = member_id
+        self.display_name = f"Member {member_id}"
+        self.mention = f"<@{member_id}>"
+        self.rest = rest
+        self.guild = None
+
+    def get_role(self, role_id):
+        role = self.guild.role
+        return role if role_id == role.id and self.id in role.holders else None
+
+    async def add_roles(self, role, reason=None):
+        await self.rest.call("add_roles")
+        role.holders[self.id] = self
+
+    async def remove_roles(self, role, reason=None):
+        await self.rest.call("remove_roles")
+        role.holders.pop(self.id, None)
+
+
+class FakeRole:
+    def __init__(self, role_id, member_cache):
+        self.id = role_id
+        self.holders = {}
+        self.member_cache = member_cache
+
+    @property
+    def members(self):
+        # discord.py only knows role members it has cached
+        return list(self.holders.values()) if self.member_cache else []
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+
+    async def edit(self, **kwargs):
+        await self.channel.rest.call("edit_message")
+
+
+class FakeChannel:
+    def __init__(self, channel_id, rest):
+        self.id = channel_id
+        self.rest = rest
+        # (perf_counter, content, kwargs) of every message sent
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((time.perf_counter(), content, kwargs))
+        await self.rest.call("send_message")
+        return FakeMessage(self, self.rest.next_id())
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+
+class FakeGuild:
+    def __init__(self, rest, members, role, channel, member_cache):
+        self.id = GUILD_ID
+        self.rest = rest
+        self.members = members
+        self.role = role
+        self.channel = channel
+        # Whether discord.py would hold members in its own cache
+        self.member_cache = member_cache
+        for member in members.values():
+            member.guild = self
+
+    def get_member(self, member_id):
+        return self.members.get(member_id) if self.member_cache else None
+
+    def get_role(self, role_id):
+        return self.role if role_id == self.role.id else None
+
+    async def fetch_channel(self, channel_id):
+        await self.rest.call("fetch_channel")
+        return self.channel
+
+    async def query_members(self, user_ids, limit=5):
+        await self.rest.call("query_members")
+        return [self.members[i] for i in user_ids if i in self.members][:limit]
+
+    async def fetch_members(self, limit=None):
+        # One REST page per 1000 members, as discord.py requests them
+        members = list(self.members.values())
+        for start in range(0, len(members), 1000):
+            await self.rest.call("fetch_members")
+            for member in members[start : start + 1000]:
+                yield member
+
+    async def fetch_member(self, member_id):
+        await self.rest.call("fetch_member")
+        if member_id not in self.members:
+            raise discord.NotFound(types.SimpleNamespace(status=404, reason="Not Found"), "")
+        return self.members[member_id]
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, route):
+        self._done = True
+        self.interaction.acknowledged_at = time.perf_counter()
+        await self.interaction.rest.call(route)
+
+    async def send_message(self, content=None, **kwargs):
+        await self._respond("interaction_response")
+
+    async def defer(self, **kwargs):
+        await self._respond("interaction_defer")
+
+    async def edit_message(self, **kwargs):
+        await self._respond("interaction_edit")
+
+
+class FakeFollowup:
+    def __init__(self, rest):
+        self.rest = rest
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.call("followup")
+
+
+class FakeInteraction:
+    def __init__(self, client, user, rest):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        self.id = discord.utils.time_snowflake(now)
+        self.created_at = now
+        self.dispatched_at = time.perf_counter()
+        self.acknowledged_at = None
+        self.client = client
+        self.guild_id = GUILD_ID
+        self.user = user
+        self.rest = rest
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(rest)
+
+
+class VirtualClock:
+    """Stands in for ``datetime`` in main; time only moves when advanced."""
+
+    def __init__(self, start):
+        self.now = start
+
+    def advance_to(self, when):
+        self.now = max(self.now, when)
+
+    def module(self):
+        clock = self
+
+        class VirtualDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return clock.now if tz is None else clock.now.astimezone(tz)
+
+        return types.SimpleNamespace(
+            datetime=VirtualDatetime,
+            timedelta=datetime.timedelta,
+            timezone=datetime.timezone,
+        )
+
+
+def configure_environment(args):
+    # settings reads these on import; main is only imported afterwards
+    os.environ.setdefault("DISCORD_TOKEN", "harness")
+    os.environ["GUILD"] = str(GUILD_ID)
+    os.environ["CHANNEL_ID"] = str(CHANNEL_ID)
+    os.environ["DICTATOR_ROLE_ID"] = str(ROLE_ID)
+    # In-memory job store; jobs only fire when the harness fires them
+    os.environ["SCHEDULER_DB_URL"] = ""
+    os.environ["METRICS_PORT"] = "0"
+    os.environ["STORAGE_BACKEND"] = args.backend
+    os.environ["BALLOT_MODE"] = args.ballot_mode
+    os.environ["LEAN_MEMBER_CACHE"] = "true" if args.lean else "false"
+    os.environ["LIVE_RESULTS"] = "true" if args.live_results else "false"
+    os.environ["LIVE_RESULTS_INTERVAL"] = str(args.live_results_interval)
+
+
+class Harness:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.rest = FakeRest(args.latency_ms / 1000, self.rng)
+        self.channel = FakeChannel(CHANNEL_ID, self.rest)
+        self.role = FakeRole(ROLE_ID, not args.lean)
+        member_count = args.nominees + args.voters
+        self.members = {
+            member_id: FakeMember(member_id, self.rest)
+            for member_id in range(FIRST_MEMBER_ID, FIRST_MEMBER_ID + member_count)
+        }
+        # The previous election's winner holds the role going in
+        incumbent = self.members[FIRST_MEMBER_ID + member_count - 1]
+        self.role.holders[incumbent.id] = incumbent
+        self.guild = FakeGuild(
+            self.rest, self.members, self.role, self.channel, not args.lean
+        )
+        self.clock = VirtualClock(datetime.datetime.now())
+        self.lag_samples = []
+        self.phases = {}
+
+    def create_bot(self, main):
+        harness = self
+
+        class HarnessBot(main.ElectionBot):
+            def get_channel(self, channel_id):
+                return harness.channel
+
+            def get_partial_messageable(self, channel_id, **kwargs):
+                return harness.channel
+
+            def get_guild(self, guild_id):
+                return harness.guild
+
+            async def fetch_guild(self, guild_id, **kwargs):
+                await harness.rest.call("fetch_guild")
+                return harness.guild
+
+        main.datetime = self.clock.module()
+        bot = HarnessBot()
+
+        async def sync(**kwargs):
+            await self.rest.call("sync_commands")
+
+        bot.tree.sync = sync
+        bot.scheduler.start = functools.partial(bot.scheduler.start, paused=True)
+        return bot
+
+    async def monitor_loop_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lag_samples.append(max(loop.time() - start - LAG_INTERVAL, 0.0))
+
+    @contextmanager
+    def phase(self, name, interactions=None):
+        self.rest.phase = name
+        lag_start = len(self.lag_samples)
+        sends_start = len(self.channel.sent)
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        report = {
+            "seconds": elapsed,
+            "rest_calls": dict(self.rest.calls[name]),
+            "loop_lag_ms": percentiles(self.lag_samples[lag_start:]),
+        }
+        if interactions:
+            report["ack_ms"] = percentiles(
+                [i.acknowledged_at - i.dispatched_at for i in interactions if i.acknowledged_at]
+            )
+            report["unacknowledged"] = sum(1 for i in interactions if not i.acknowledged_at)
+        sends = self.channel.sent[sends_start:]
+        tables = [sent_at for sent_at, _, kwargs in sends if "embeds" in kwargs]
+        if name == "end_voting" and tables:
+            # The winner announcement is the first message, the table the last
+            report["announced_seconds"] = sends[0][0] - started
+            report["results_posted_seconds"] = tables[-1] - started
+            report["result_messages"] = len(tables)
+        self.phases[name] = report
+
+    async def fire(self, bot, job_id):
+        from scheduler import run_job
+
+        job = bot.scheduler.get_job(job_id)
+        if job is None:
+            raise RuntimeError(f"Job {job_id} is not scheduled")
+        self.clock.advance_to(job.next_run_time.astimezone().replace(tzinfo=None))
+        # A date job is removed by the scheduler once it has run
+        bot.scheduler.remove_job(job_id)
+        await run_job(*job.args)
+
+    async def dispatch(self, bot, calls, interactions):
+        # Interactions arrive at --rate per second, or all at once; each is
+        # created on arrival so time-to-acknowledge includes queueing
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = []
+        for position, (user, handler) in enumerate(calls):
+            if self.args.rate:
+                delay = start + position / self.args.rate - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            interaction = FakeInteraction(bot, user, self.rest)
+            interactions.append(interaction)
+            tasks.append(asyncio.create_task(handler(interaction)))
+        await asyncio.gather(*tasks)
+
+    def cast_ballot(self, bot, select, nominee_ids, weights):
+        async def handle(interaction):
+            if self.args.ballot_mode == "ranked":
+                ranking = []
+                while len(ranking) < min(3, len(nominee_ids)):
+                    choice = self.rng.choices(nominee_ids, weights)[0]
+                    if choice not in ranking:
+                        ranking.append(choice)
+                await bot.rank(interaction, *ranking)
+            else:
+                choice = self.rng.choices(nominee_ids, weights)[0]
+                selected_values.set({select.custom_id: [choice]})
+                await select.callback(interaction)
+
+        return handle
+
+    async def run(self, main):
+        monitor = asyncio.create_task(self.monitor_loop_lag())
+        bot = self.create_bot(main)
+        try:
+            with self.phase("startup"):
+                await bot.setup_hook()
+
+            with self.phase("open_nominations"):
+                await self.fire(bot, "election_cycle")
+
+            candidates = list(self.members.values())[: self.args.nominees]
+            nominations = []
+            with self.phase("nominate", nominations):
+                await self.dispatch(
+                    bot,
+                    [(candidate, bot.nominateme) for candidate in candidates],
+                    nominations,
+                )
+
+            with self.phase("close_nominations"):
+                await self.fire(bot, "close_nominations")
+            with self.phase("start_voting"):
+                await self.fire(bot, "start_voting")
+
+            select = None
+            if self.args.ballot_mode != "ranked":
+                view = next(
+                    kwargs["view"] for _, _, kwargs in self.channel.sent if kwargs.get("view")
+                )
+                select = view.children[0]
+            nominee_ids = [str(candidate.id) for candidate in candidates]
+            # A few popular nominees and a long tail, so there is a clear winner
+            weights = [1 / (rank + 1) for rank in range(len(nominee_ids))]
+            voters = list(self.members.values())[self.args.nominees :]
+            handler = self.cast_ballot(bot, select, nominee_ids, weights)
+            ballots = []
+            with self.phase("vote", ballots):
+                await self.dispatch(
+                    bot,
+                    [
+                        (voters[i % len(voters)], handler)
+                        for i in range(self.args.ballots or len(voters))
+                    ],
+                    ballots,
+                )
+
+            with self.phase("end_voting"):
+                await self.fire(bot, "end_voting")
+        finally:
+            with self.phase("shutdown"):
+                for election in bot.elections.values():
+                    await election.nominees.close()
+            monitor.cancel()
+
+        return {
+            "config": vars(self.args),
+            "phases": self.phases,
+            "rest_calls_total": sum(
+                sum(calls.values()) for calls in self.rest.calls.values()
+            ),
+            "dictators": sorted(self.role.holders),
+        }
+
+
+def print_report(report):
+    for name, phase in report["phases"].items():
+        line = f"{name:<18}{phase['seconds'] * 1000:>10.1f} ms"
+        lag = phase["loop_lag_ms"]
+        if lag:
+            line += f"  lag p99 {lag['p99']:.1f} max {lag['max']:.1f} ms"
+        ack = phase.get("ack_ms")
+        if ack:
+            line += (
+                f"  ack p50 {ack['p50']:.1f} p95 {ack['p95']:.1f} "
+                f"p99 {ack['p99']:.1f} max {ack['max']:.1f} ms"
+            )
+        if "results_posted_seconds" in phase:
+            line += (
+                f"  announced after {phase['announced_seconds'] * 1000:.1f} ms, "
+                f"results posted after {phase['results_posted_seconds'] * 1000:.1f} ms "
+                f"in {phase['result_messages']} message(s)"
+            )
+        print(line)
+        if phase["rest_calls"]:
+            calls = ", ".join(f"{route} {n}" for route, n in sorted(phase["rest_calls"].items()))
+            print(f"{'':<18}REST: {calls}")
+    print(f"Total REST calls: {report['rest_calls_total']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nominees", type=int, default=25)
+    parser.add_argument("--voters", type=int, default=1000)
+    parser.add_argument(
+        "--ballots", type=int, default=0, help="ballot interactions (default: one per voter)"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=0, help="interactions per second (default: all at once)"
+    )
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated REST round trip")
+    parser.add_argument("--backend", choices=("csv", "sqlite"), default="csv")
+    parser.add_argument("--ballot-mode", choices=("fptp", "ranked"), default="fptp")
+    parser.add_argument("--lean", action="store_true", help="run with LEAN_MEMBER_CACHE")
+    parser.add_argument("--live-results", action="store_true")
+    parser.add_argument("--live-results-interval", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    output = os.path.abspath(args.output) if args.output else None
+    sys.path.insert(0, os.getcwd())
+    with tempfile.TemporaryDirectory() as directory:
+        # Storage and schedule files are relative to the working directory
+        os.chdir(directory)
+        bot_module = importlib.import_module("main")
+        report = asyncio.run(Harness(args).run(bot_module))
+
+    print_report(report)
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
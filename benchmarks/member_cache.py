@@ -0,0 +1,129 @@
+"""Compare member-cache memory for the default and lean intent profiles.
+
+Builds a synthetic guild through discord.py's own payload parsing, once
+with the full member cache and presences, and once in lean mode where only
+the election's MemberCache holds nominees, this cycle's voters and the
+dictator-role holders. Run from the repository root:
+
+    python -m benchmarks.member_cache --members 100000
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+import discord
+
+from members import MemberCache
+
+GUILD_ID = 1 << 40
+ROLE_ID = GUILD_ID + 1
+
+
+def member_payload(member_id):
+    return {
+        "user": {
+            "id": str(member_id),
+            "username": f"member{member_id}",
+            "discriminator": "0",
+            "global_name": f"Member {member_id}",
+            "avatar": None,
+        },
+        "nick": None,
+        "roles": [],
+        "joined_at": "2024-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def presence_payload(member_id):
+    return {
+        "user": {"id": str(member_id)},
+        "status": "online",
+        "client_status": {"desktop": "online"},
+        "activities": [{"type": 0, "name": "Elections", "created_at": 0}],
+    }
+
+
+def guild_payload(member_count, presences):
+    ids = range(GUILD_ID + 10, GUILD_ID + 10 + member_count)
+    return {
+        "id": str(GUILD_ID),
+        "name": "Synthetic guild",
+        "member_count": member_count,
+        "roles": [
+            {"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0},
+            {"id": str(ROLE_ID), "name": "Dictator", "permissions": "0", "position": 1},
+        ],
+        "members": [member_payload(member_id) for member_id in ids],
+        "presences": [presence_payload(member_id) for member_id in ids] if presences else [],
+    }
+
+
+def measure(label, build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<6} {(after - before) / 1024 / 1024:10.1f} MiB")
+    return kept
+
+
+def build_full(member_count):
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.presences = True
+    client = discord.Client(intents=intents)
+    payload = guild_payload(member_count, presences=True)
+    guild = discord.Guild(data=payload, state=client._connection)
+    del payload
+    return client, guild
+
+
+def build_lean(member_count, nominee_count, voter_share):
+    intents = discord.Intents.default()
+    intents.members = True
+    client = discord.Client(
+        intents=intents, member_cache_flags=discord.MemberCacheFlags.none()
+    )
+    payload = guild_payload(member_count, presences=False)
+    members = payload.pop("members")
+    guild = discord.Guild(data=payload, state=client._connection)
+    cache = MemberCache()
+    voter_count = int(member_count * voter_share)
+    # Members that reach the bot through interactions or targeted fetches
+    for data in members[: max(nominee_count, voter_count)]:
+        cache.remember(discord.Member(data=data, guild=guild, state=client._connection))
+    cache.remember_role_holders(
+        [discord.Member(data=members[-1], guild=guild, state=client._connection)]
+    )
+    del members
+    return client, guild, cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=100_000)
+    parser.add_argument("--nominees", type=int, default=25)
+    parser.add_argument(
+        "--voter-share",
+        type=float,
+        default=0.1,
+        help="fraction of the guild that votes this cycle",
+    )
+    args = parser.parse_args()
+
+    print(f"Synthetic guild with {args.members} members")
+    full = measure("full", lambda: build_full(args.members))
+    del full
+    lean = measure("lean", lambda: build_lean(args.members, args.nominees, args.voter_share))
+    print(f"lean cache holds {len(lean[2])} members")
+
+
+if __name__ == "__main__":
+    main()
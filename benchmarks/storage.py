@@ -0,0 +1,192 @@
+"""Micro-benchmarks for the Nomination storage layer.
+
+Drives Nomination directly with synthetic voters and candidates for each
+storage backend, voter count and workload, and reports throughput, p50/p99
+latency per operation and peak memory. Every scenario runs in a fresh
+process inside a temporary directory. Results are written as JSON so runs
+can be compared across commits. Run from the repository root:
+
+    python -m benchmarks.storage --scales 1000,10000,100000,1000000
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from nomination import Nomination
+from storage import create_storage
+
+NOMINEE_COUNT = 25
+LOOKUPS = 10_000
+TALLY_READS = 1_000
+# Ballots cast per voter in the revote-heavy workload
+REVOTES = 3
+
+
+class Member:
+    def __init__(self, member_id):
+        self.id = member_id
+        self.display_name = f"Member {member_id}"
+
+
+def summarize(samples_ns, elapsed):
+    samples = sorted(samples_ns)
+    return {
+        "operations": len(samples),
+        "ops_per_second": len(samples) / elapsed if elapsed else None,
+        "p50_us": samples[len(samples) // 2] / 1000 if samples else None,
+        "p99_us": samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000
+        if samples
+        else None,
+    }
+
+
+def measure(operation, arguments):
+    samples = []
+    started = time.perf_counter()
+    for argument in arguments:
+        start = time.perf_counter_ns()
+        operation(argument)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples, time.perf_counter() - started)
+
+
+async def run_operations(backend, voters, workload, writer):
+    nomination = Nomination(create_storage(backend))
+    if writer:
+        nomination.start_writer()
+    rng = random.Random(voters)
+    candidates = [Member(candidate_id) for candidate_id in range(1, NOMINEE_COUNT + 1)]
+    results = {}
+
+    results["nominate_candidate"] = measure(nomination.nominate_candidate, candidates)
+    results["is_candidate_nominated"] = measure(
+        nomination.is_candidate_nominated,
+        [Member(rng.randrange(1, NOMINEE_COUNT * 2)) for _ in range(LOOKUPS)],
+    )
+    results["get_nominations"] = measure(
+        lambda _: nomination.get_nominations(), range(LOOKUPS)
+    )
+
+    voter_ids = range(1_000_000, 1_000_000 + voters)
+    if workload == "revote":
+        ballots = [rng.choice(voter_ids) for _ in range(voters * REVOTES)]
+    else:
+        ballots = list(voter_ids)
+    pool = {voter_id: Member(voter_id) for voter_id in set(ballots)}
+    votes = [(pool[voter_id], rng.randrange(1, NOMINEE_COUNT + 1)) for voter_id in ballots]
+    del pool, ballots
+
+    started = time.perf_counter()
+    results["record_vote"] = measure(lambda vote: nomination.record_vote(*vote), votes)
+    # Yield to the writer while it drains, as the event loop would between interactions
+    await asyncio.sleep(0)
+    results["get_votes"] = measure(lambda _: nomination.get_votes(), range(TALLY_READS))
+    await nomination.close()
+    # Includes flushing everything the writer still had queued
+    results["record_vote"]["durable_seconds"] = time.perf_counter() - started
+
+    reloaded_started = time.perf_counter()
+    Nomination(create_storage(backend)).storage.close()
+    results["reload_seconds"] = time.perf_counter() - reloaded_started
+    return results
+
+
+def run_scenario(scenario, queue):
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        results = asyncio.run(
+            run_operations(
+                scenario["backend"],
+                scenario["voters"],
+                scenario["workload"],
+                scenario["writer"],
+            )
+        )
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mib"] = peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    queue.put(results)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="1000,10000,100000,1000000")
+    parser.add_argument("--backends", default="csv,sqlite")
+    parser.add_argument("--workloads", default="unique,revote")
+    parser.add_argument(
+        "--no-writer",
+        action="store_true",
+        help="write every operation through to storage instead of batching",
+    )
+    parser.add_argument("--output", help="JSON file (default: benchmarks/results/storage-<commit>.json)")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    output = args.output or os.path.join("benchmarks", "results", f"storage-{commit}.json")
+    report = {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "writer": not args.no_writer,
+        "scenarios": [],
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for backend in args.backends.split(","):
+        for workload in args.workloads.split(","):
+            for voters in (int(scale) for scale in args.scales.split(",")):
+                scenario = {
+                    "backend": backend,
+                    "workload": workload,
+                    "voters": voters,
+                    "writer": not args.no_writer,
+                }
+                queue = context.Queue()
+                process = context.Process(target=run_scenario, args=(scenario, queue))
+                process.start()
+                results = queue.get()
+                process.join()
+                report["scenarios"].append({**scenario, "results": results})
+
+                vote = results["record_vote"]
+                print(
+                    f"{backend:<7}{workload:<8}{voters:>9} voters  "
+                    f"record_vote {vote['ops_per_second']:>12,.0f}/s "
+                    f"p50 {vote['p50_us']:.1f}us p99 {vote['p99_us']:.1f}us "
+                    f"durable {vote['durable_seconds']:.2f}s  "
+                    f"get_votes p50 {results['get_votes']['p50_us']:.1f}us  "
+                    f"peak {results['peak_rss_mib']:.0f} MiB"
+                )
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import os
+
+
+class GuildConfig:
+    """Where one guild's election is announced and where its state is kept."""
+
+    def __init__(self, guild_id, channel_id, role_id, directory, jobstore, job_prefix):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.role_id = role_id
+        # Storage, schedule and ballot files of this guild only
+        self.directory = directory
+        # Scheduler job store alias and prefix of this guild's job ids
+        self.jobstore = jobstore
+        self.job_prefix = job_prefix
+
+    def job_id(self, name):
+        return f"{self.job_prefix}{name}"
+
+
+def shard_id(guild_id, shard_count):
+    # The shard Discord delivers a guild's events on
+    return (guild_id >> 22) % shard_count
+
+
+def load_guild_configs(config_file, data_dir, guild_id, channel_id, role_id):
+    """Return the GuildConfig of every guild to run elections for.
+
+    Without ``config_file`` this is the single guild from the GUILD,
+    CHANNEL_ID and DICTATOR_ROLE_ID settings, with its files in the working
+    directory and unprefixed job ids in the default job store, as before
+    guilds had their own state. ``config_file`` is a JSON list of
+    ``{"guild_id", "channel_id", "dictator_role_id"}`` objects; each of
+    those guilds keeps its files in ``data_dir/<guild id>`` and its jobs in
+    a job store of its own.
+    """
+    if not config_file:
+        if not guild_id:
+            raise ValueError("Set GUILD, CHANNEL_ID and DICTATOR_ROLE_ID, or GUILD_CONFIG_FILE")
+        return [GuildConfig(guild_id, channel_id, role_id, ".", "default", "")]
+
+    with open(config_file, "r") as f:
+        entries = json.load(f)
+    configs = []
+    for entry in entries:
+        config_guild_id = int(entry["guild_id"])
+        configs.append(
+            GuildConfig(
+                config_guild_id,
+                int(entry["channel_id"]),
+                int(entry["dictator_role_id"]),
+                os.path.join(data_dir, str(config_guild_id)),
+                str(config_guild_id),
+                f"{config_guild_id}:",
+            )
+        )
+    return configs
@@ -0,0 +1,151 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from logging.config import dictConfig
+
+# Structured fields attached to every record while they are set
+_phase = contextvars.ContextVar("phase", default=None)
+_interaction = contextvars.ContextVar("interaction", default=None)
+_guild = contextvars.ContextVar("guild", default=None)
+# Guild id -> current election of that guild
+_elections = {}
+
+_listener = None
+
+
+def set_log_context(phase=None, interaction=None, guild=None):
+    """Tag records logged from the current task with a phase, interaction or guild id."""
+    if phase is not None:
+        _phase.set(phase)
+    if interaction is not None:
+        _interaction.set(interaction)
+    if guild is not None:
+        _guild.set(guild)
+
+
+def set_election(election, guild=None):
+    _elections[guild] = election
+
+
+class ContextFilter(logging.Filter):
+    # Runs on the logging caller's thread before the record is queued, so
+    # the task-local context is still visible
+    def filter(self, record):
+        record.guild = _guild.get()
+        if record.guild is None and len(_elections) == 1:
+            # Single-guild deployments tag every record with the election
+            record.election = next(iter(_elections.values()))
+        else:
+            record.election = _elections.get(record.guild)
+        record.phase = _phase.get()
+        record.interaction = _interaction.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the guild/election/phase/interaction fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "message": record.getMessage(),
+        }
+        for field in ("guild", "election", "phase", "interaction"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SizedTimedRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """Rotates on a schedule and also whenever the file exceeds max_bytes."""
+
+    def __init__(self, filename, max_bytes=0, **kwargs):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+
+    def shouldRollover(self, record):
+        if self.max_bytes and self.stream is not None:
+            if self.stream.tell() >= self.max_bytes:
+                return True
+        return super().shouldRollover(record)
+
+    def rotation_filename(self, default_name):
+        # Several size rollovers can share one date suffix; never overwrite one
+        name, counter = default_name, 0
+        while os.path.exists(name):
+            counter += 1
+            name = f"{default_name}.{counter}"
+        return name
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the record here and drops exc_info, which
+    # would leave tracebacks inside the message; only merge the arguments
+    # and let the handlers behind the queue format the exception
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _LoggerRouter(logging.Handler):
+    # Sends each dequeued record to the handlers its logger was configured with
+    def __init__(self, routes):
+        super().__init__()
+        self.routes = routes
+
+    def handle(self, record):
+        name = record.name
+        while name not in self.routes and name:
+            name = name.rpartition(".")[0]
+        for handler in self.routes.get(name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
+
+
+def start_logging(config):
+    """Apply ``config`` with every handler moved behind one queue.
+
+    Loggers only pay for an enqueue; a single background listener thread
+    formats and writes the records to the configured handlers.
+    """
+    global _listener
+    dictConfig(config)
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    routes = {}
+    for name in list(config.get("loggers", {})) + [""]:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            routes[name] = list(logger.handlers)
+            logger.handlers = [queue_handler]
+
+    _listener = logging.handlers.QueueListener(log_queue, _LoggerRouter(routes))
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Drain the queue and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,139 +1,278 @@
 import settings
+import asyncio
 import discord
 from discord.ext import commands
 from discord import app_commands
+from archive import archive_path, write_archive
+from ballot import Ballot
+from guilds import load_guild_configs, shard_id
+from logutil import set_election, set_log_context, start_logging
+import metrics
+from metrics import InteractionTimer
+from members import MemberCache, fetch_role_holders, resolve_members
 from nomination import Nomination
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from ratelimit import TokenBucket
+from results import (
+    LiveScoreboard,
+    build_results_embed,
+    build_results_embeds,
+    reassign_role,
+    send_embeds,
+)
+from status import StatusSnapshot, snapshot_route
+from scheduler import (
+    create_jobstore,
+    create_scheduler,
+    load_schedule,
+    run_job,
+    save_schedule,
+    set_job_target,
+)
+from storage import create_storage
+from webserver import LocalHttpServer
+from tally import (
+    instant_runoff,
+    plurality_winners,
+    rankings_matrix,
+    result_fields,
+    runoff_fields,
+)
 import datetime
+import hashlib
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+from apscheduler.events import EVENT_JOB_SUBMITTED
 from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 
 logger = settings.logging.getLogger("bot")
-nominees = Nomination()
-
-
-class ElectionBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.default()
-        intents.members = True
-        intents.message_content = True
-        intents.presences = True
-        super().__init__(command_prefix=".", intents=intents)
-        self.scheduler = AsyncIOScheduler()
+# Parameters of /rank in ranked ballot mode, most preferred first
+RANK_CHOICES = ("first", "second", "third", "fourth", "fifth")
+# Sharded deployments run several gateway shards from one process
+BotBase = commands.AutoShardedBot if settings.SHARD_COUNT else commands.Bot
+
+
+@contextmanager
+def log_duration(phase):
+    start = time.perf_counter()
+    yield
+    logger.info(f"Startup: {phase} took {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+class GuildElection:
+    """One guild's election: its schedule, nominees, votes and scheduler jobs.
+
+    Every file it reads or writes is in ``config.directory`` and every job
+    it schedules is in ``config.jobstore``, so guilds never share state.
+    """
+
+    def __init__(self, bot, config):
+        self.bot = bot
+        self.config = config
+        self.guild_id = config.guild_id
+        self.guild_object = discord.Object(id=config.guild_id)
+        os.makedirs(config.directory, exist_ok=True)
+        self.nominees = Nomination(
+            create_storage(settings.STORAGE_BACKEND, settings.SQLITE_PATH, config.directory),
+            coalesce_window=settings.VOTE_COALESCE_SECONDS,
+        )
+        self.member_cache = MemberCache()
+        # Precomputed ballot pages and name index while voting is open
+        self.ballot = None
+        # Channel and message ids of the posted ballot, kept across restarts
+        self.ballot_message = self._load_ballot_message()
+        self.scoreboard = None
+        # Per-voter limit on ballot changes during the voting window
+        self.vote_limiter = TokenBucket(
+            rate=1 / settings.VOTE_RATE_INTERVAL
+            if settings.VOTE_RATE_BURST and settings.VOTE_RATE_INTERVAL > 0
+            else 0,
+            burst=settings.VOTE_RATE_BURST,
+        )
+        self.dictator_ids = self._load_dictator_ids()
         self.schedule_data = self._load_schedule_data()
+        # Outcome of the last processed election, served by the status API
+        self.last_result = self._load_last_result()
+        # Status snapshot and the nominee list it was built from
+        self._status = None
+        self._status_nominations = None
+        if "last_election" in self.schedule_data:
+            set_election(self.schedule_data["last_election"].isoformat(), guild=self.guild_id)
 
-        self.guild_object = discord.Object(id=settings.GUILDS_ID)
+    @property
+    def scheduler(self):
+        return self.bot.scheduler
 
-        # Register commands directly in the class
-        self.tree.command(
-            name="nominateme", description="Nominate yourself", guild=self.guild_object
-        )(self.nominateme)
-        self.tree.command(
-            name="force_start_nominations",
-            description="ADMIN: Start nomination period immediately",
-            guild=self.guild_object,
-        )(self.force_start_nominations)
+    def _path(self, name):
+        return os.path.join(self.config.directory, name)
 
-        self.tree.command(
-            name="force_start_voting",
-            description="ADMIN: Start voting period immediately",
-            guild=self.guild_object,
-        )(self.force_start_voting)
+    def _load_schedule_data(self):
+        schedule_data = load_schedule(self.config.directory)
+        if "last_election" in schedule_data:
+            schedule_data["next_election"] = schedule_data[
+                "last_election"
+            ] + datetime.timedelta(weeks=10)
+        return schedule_data
 
-        self.tree.command(
-            name="force_end_election",
-            description="ADMIN: End election immediately",
-            guild=self.guild_object,
-        )(self.force_end_election)
+    def _save_schedule_data(self):
+        save_schedule(self.schedule_data, self.config.directory)
+        self._status_changed()
 
-        self.tree.command(
-            name="schedule",
-            description="View the election schedule",
-            guild=self.guild_object,
-        )(self.view_schedule)
+    def _load_dictator_ids(self):
+        try:
+            with open(self._path("dictators.txt"), "r") as f:
+                return {int(line) for line in f if line.strip()}
+        except FileNotFoundError:
+            # None until the first election records the holders
+            return None
+        except ValueError:
+            return set()
+
+    def _save_dictator_ids(self):
+        with open(self._path("dictators.txt"), "w") as f:
+            f.write("".join(f"{member_id}\n" for member_id in self.dictator_ids))
+
+    def _load_ballot_message(self):
+        try:
+            with open(self._path("ballot.json"), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
 
-    def _load_schedule_data(self):
+    def _save_ballot_message(self):
+        if self.ballot_message is None:
+            if os.path.exists(self._path("ballot.json")):
+                os.remove(self._path("ballot.json"))
+            return
+        # Write-then-rename, so a crash never leaves a torn ballot.json behind
+        tmp_file = self._path("ballot.json.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(self.ballot_message, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self._path("ballot.json"))
+
+    def _load_last_result(self):
         try:
-            with open("last_election.txt", "r") as f:
-                last_timestamp = int(f.read().strip())
-                last_date = datetime.datetime.fromtimestamp(last_timestamp)
-                return {
-                    "last_election": last_date,
-                    "next_election": last_date + datetime.timedelta(weeks=10),
-                }
+            with open(self._path("results.json"), "r") as f:
+                return json.load(f)
         except (FileNotFoundError, ValueError):
-            return {}
+            return None
 
-    def _save_schedule_data(self):
-        if "last_election" in self.schedule_data:
-            with open("last_election.txt", "w") as f:
-                timestamp = int(self.schedule_data["last_election"].timestamp())
-                f.write(str(timestamp))
+    def _save_last_result(self):
+        with open(self._path("results.json"), "w") as f:
+            json.dump(self.last_result, f)
+        self._status_changed()
+
+    def _start_scoreboard(self, message):
+        self.scoreboard = LiveScoreboard(
+            message, self.nominees, settings.LIVE_RESULTS_INTERVAL
+        )
+        self.scoreboard.start()
 
     def _update_schedule(self, key, when):
         self.schedule_data[key] = when
         if key == "nomination_start":
-            self.schedule_data["last_election"] = when
-
-    async def setup_hook(self):
-        await self.tree.sync(guild=self.guild_object)
-        self.scheduler.start()
+            self._set_last_election(when)
+        self._save_schedule_data()
 
-        # Check for existing voting phases
-        now = datetime.datetime.now()
-        if "voting_end" in self.schedule_data:
-            if self.schedule_data["voting_end"] > now:
-                self._schedule_job(
-                    "end_voting", self.schedule_data["voting_end"], self.end_voting
+    def _set_last_election(self, when):
+        self.schedule_data["last_election"] = when
+        set_election(when.isoformat(), guild=self.guild_id)
+        self.schedule_data["next_election"] = when + datetime.timedelta(weeks=10)
+
+    def restore_ballot(self):
+        # Re-attach the live ballot to its posted message after a restart
+        if self.ballot_message and self.nominees.get_nominations():
+            self.ballot = Ballot(self.nominees.get_nominations())
+            if settings.BALLOT_MODE != "ranked":
+                self.bot.add_view(
+                    ElectionView(self.ballot),
+                    message_id=self.ballot_message["message_id"],
                 )
-            else:
-                await self.end_voting()
-
-        elif "voting_start" in self.schedule_data:
-            if self.schedule_data["voting_start"] > now:
-                self._schedule_job(
-                    "start_voting",
-                    self.schedule_data["voting_start"],
-                    self.start_voting,
+            if self.ballot_message.get("scoreboard_message_id"):
+                channel = self.bot.get_partial_messageable(
+                    self.ballot_message["channel_id"]
                 )
-            else:
-                await self.start_voting()
-
-        elif "nomination_close" in self.schedule_data:
-            if self.schedule_data["nomination_close"] > now:
-                self._schedule_job(
-                    "close_nominations",
-                    self.schedule_data["nomination_close"],
-                    self.close_nominations,
+                self._start_scoreboard(
+                    channel.get_partial_message(
+                        self.ballot_message["scoreboard_message_id"]
+                    )
                 )
-            else:
-                await self.close_nominations()
 
-        else:
+    async def start_schedule(self):
+        # Periodically fold the append-only vote journal down to one row per voter
+        self.scheduler.add_job(
+            run_job,
+            trigger=IntervalTrigger(minutes=settings.VOTE_COMPACTION_MINUTES),
+            args=["compact_votes", self.guild_id],
+            id=self.config.job_id("compact_votes"),
+            jobstore=self.config.jobstore,
+            replace_existing=True,
+        )
+
+        # The nomination window is open between its start and close
+        if (
+            "nomination_close" in self.schedule_data
+            and "voting_start" not in self.schedule_data
+            and not self._get_job("election_cycle")
+        ):
+            self.nominees.open_nomination_period()
+            self._status_changed()
+
+        # Pending phase jobs are reloaded from the job store as-is
+        if not any(
+            job.id != self.config.job_id("compact_votes")
+            for job in self.scheduler.get_jobs(jobstore=self.config.jobstore)
+        ):
             await self.schedule_elections()
 
+    async def compact_votes(self):
+        self.nominees.compact_votes()
+
     async def schedule_elections(self):
         # Use schedule data instead of reading file directly
         if "next_election" in self.schedule_data:
             next_date = self.schedule_data["next_election"]
             if next_date > datetime.datetime.now():
-                self._schedule_job("election_cycle", next_date, self.open_nominations)
+                self._schedule_job("election_cycle", next_date, "open_nominations")
                 self._update_schedule("nomination_start", next_date)
                 return
 
         # Fallback to default Monday scheduling
         next_monday = self.get_next_monday()
-        self._schedule_job("election_cycle", next_monday, self.open_nominations)
+        self._schedule_job("election_cycle", next_monday, "open_nominations")
         self._update_schedule("nomination_start", next_monday)
 
-    def _schedule_job(self, job_id, when, func):
-        if self.scheduler.get_job(job_id):
-            self.scheduler.remove_job(job_id)
-
-        self.scheduler.add_job(func, trigger=DateTrigger(when), id=job_id)
+    def _schedule_job(self, job_id, when, method_name):
+        # Jobs call run_job by reference so the job store can persist them
+        self.scheduler.add_job(
+            run_job,
+            trigger=DateTrigger(when),
+            args=[method_name, self.guild_id],
+            id=self.config.job_id(job_id),
+            jobstore=self.config.jobstore,
+            replace_existing=True,
+        )
 
         if not self.scheduler.running:
             self.scheduler.start()
 
+    def _get_job(self, job_id):
+        return self.scheduler.get_job(
+            self.config.job_id(job_id), jobstore=self.config.jobstore
+        )
+
+    def _remove_job(self, job_id):
+        if self._get_job(job_id):
+            self.scheduler.remove_job(
+                self.config.job_id(job_id), jobstore=self.config.jobstore
+            )
+
     def get_next_monday(self):
         today = datetime.datetime.now()
         days_ahead = (0 - today.weekday() + 7) % 7  # 0 is Monday
@@ -143,25 +282,20 @@ class ElectionBot(commands.Bot):
     async def open_nominations(self):
         # Update schedule data instead of writing directly to file
         current_time = datetime.datetime.now()
-        self.schedule_data["last_election"] = current_time
+        self._set_last_election(current_time)
         self._save_schedule_data()
 
         # Clear existing jobs first
         for job_id in ["close_nominations", "start_voting", "end_voting"]:
-            if self.scheduler.get_job(job_id):
-                self.scheduler.remove_job(job_id)
-        nominees.open_nomination_period()
-        announcement_channel = self.get_channel(settings.CHANNEL_ID)
+            self._remove_job(job_id)
+        self.nominees.open_nomination_period()
+        announcement_channel = self.bot.get_channel(self.config.channel_id)
 
         # Schedule close for Thursday 23:59
         thursday = self.get_next_monday() + datetime.timedelta(
             days=3, hours=23, minutes=59
         )
-        self.scheduler.add_job(
-            self.close_nominations,
-            trigger=DateTrigger(thursday),
-            id="close_nominations",
-        )
+        self._schedule_job("close_nominations", thursday, "close_nominations")
         self._update_schedule("nomination_close", thursday)
 
         thursday_ts = int(thursday.timestamp())
@@ -172,10 +306,10 @@ class ElectionBot(commands.Bot):
         )
 
     async def close_nominations(self):
-        if self.scheduler.get_job("close_nominations"):
-            self.scheduler.remove_job("close_nominations")
-        nominees.close_nomination_period()
-        announcement_channel = self.get_channel(settings.CHANNEL_ID)
+        self._remove_job("close_nominations")
+        self.nominees.close_nomination_period()
+        self._status_changed()
+        announcement_channel = self.bot.get_channel(self.config.channel_id)
         await announcement_channel.send(
             "⛔ Nominaties gesloten. Stemmen begint morgen!"
         )
@@ -185,116 +319,183 @@ class ElectionBot(commands.Bot):
         friday = (now + datetime.timedelta(days=1)).replace(
             hour=0, minute=0, second=0, microsecond=0
         )
-        self.scheduler.add_job(
-            self.start_voting, trigger=DateTrigger(friday), id="start_voting"
-        )
+        self._schedule_job("start_voting", friday, "start_voting")
         self._update_schedule("voting_start", friday)
 
     async def start_voting(self):
-        if self.scheduler.get_job("start_voting"):
-            self.scheduler.remove_job("start_voting")
+        self._remove_job("start_voting")
 
-        nominee_list = nominees.get_nominations()
+        nominee_list = self.nominees.get_nominations()
         if not nominee_list:
-            channel = self.get_channel(settings.CHANNEL_ID)
+            channel = self.bot.get_channel(self.config.channel_id)
             await channel.send("❌ No nominees. Election canceled.")
             return
 
-        election_channel = self.get_channel(settings.CHANNEL_ID)
-        view = ElectionView(nominee_list)
+        election_channel = self.bot.get_channel(self.config.channel_id)
+        self.ballot = Ballot(nominee_list)
+        if settings.BALLOT_MODE == "ranked":
+            # Ranked ballots are cast with /rank; there is no select menu
+            view = None
+            instructions = "📝 Rangschik de kandidaten met `/rank`.\n"
+        else:
+            view = ElectionView(self.ballot)
+            instructions = ""
 
         # Schedule vote closing in 24 hours
-        self.scheduler.add_job(
-            self.end_voting,
-            trigger=DateTrigger(datetime.datetime.now() + datetime.timedelta(hours=24)),
-            id="end_voting",
-        )
         end_time = datetime.datetime.now() + datetime.timedelta(hours=24)
+        self._schedule_job("end_voting", end_time, "end_voting")
         self._update_schedule("voting_end", end_time)
         end_ts = int(end_time.timestamp())
-        self.vote_message = await election_channel.send(
+        vote_message = await election_channel.send(
             f"🗳️ @everyone Stem op de nieuwe dictator!\n"
+            f"{instructions}"
             f"⏳ Stemmen eindigt op <t:{end_ts}:F> (<t:{end_ts}:R>)",
             view=view,
             allowed_mentions=discord.AllowedMentions(everyone=True),
         )
+        self.ballot_message = {
+            "channel_id": vote_message.channel.id,
+            "message_id": vote_message.id,
+        }
+        if settings.LIVE_RESULTS:
+            scoreboard_message = await election_channel.send(
+                embed=build_results_embed({}, {}, title="Tussenstand (live)")
+            )
+            self.ballot_message["scoreboard_message_id"] = scoreboard_message.id
+            self._start_scoreboard(scoreboard_message)
+        self._save_ballot_message()
 
     async def end_voting(self):
-        self.schedule_data = {}
-        await self.vote_message.edit(view=None)
+        # Only the cycle anchor survives; the phase timestamps are done with
+        self.schedule_data = {
+            key: self.schedule_data[key]
+            for key in ("last_election", "next_election")
+            if key in self.schedule_data
+        }
+        self.ballot = None
+        self._save_schedule_data()
+        self.vote_limiter.clear()
+        # Votes still inside the coalescing window go to storage before the tally
+        self.nominees.flush_votes()
+        if self.scoreboard:
+            await self.scoreboard.stop()
+            await self.scoreboard.refresh()
+            self.scoreboard = None
+        if self.ballot_message:
+            channel = self.bot.get_partial_messageable(self.ballot_message["channel_id"])
+            vote_message = channel.get_partial_message(
+                self.ballot_message["message_id"]
+            )
+            try:
+                await vote_message.edit(view=None)
+            except discord.NotFound:
+                logger.warning("Ballot message no longer exists")
+            self.ballot_message = None
+            self._save_ballot_message()
         await self.process_election_results()
 
     async def process_election_results(self, guild=None, channel=None):
+        # What was announced, kept with the archived ballots for recounts
+        display_names = {}
+        result = None
+        # The ballots as tallied; the announcement and the archive both use these
+        ballots = self.nominees.ballot_snapshot()
         try:
             if not guild:
                 # Use get_guild instead of fetch_guild to access cached members
-                guild = self.get_guild(settings.GUILDS_ID)
+                guild = self.bot.get_guild(self.guild_id)
                 if not guild:
-                    guild = await self.fetch_guild(settings.GUILDS_ID)
-                    # Refresh member cache if needed
-                    await guild.chunk()
+                    guild = await self.bot.fetch_guild(self.guild_id)
             if not channel:
-                channel = await guild.fetch_channel(settings.CHANNEL_ID)
+                channel = await guild.fetch_channel(self.config.channel_id)
 
             # Election processing logic
-            nominee_votes = nominees.get_votes()
-            total_votes = sum(nominee_votes.values())
+            votes, rankings = ballots
+            nominee_votes = votes.tally()
+
+            if settings.BALLOT_MODE == "ranked":
+                candidate_ids = [
+                    nominee_id for nominee_id, _ in self.nominees.get_nominations()
+                ]
+            else:
+                candidate_ids = list(nominee_votes)
+
+            # Resolve each nominee in the tally once, fetching only uncached ones
+            with metrics.RESULT_PHASE_SECONDS.time(phase="resolve_members"):
+                members = await resolve_members(
+                    guild,
+                    [int(nominee_id) for nominee_id in candidate_ids],
+                    self.member_cache,
+                )
+            display_names = {
+                nominee_id: members[int(nominee_id)].display_name
+                for nominee_id in candidate_ids
+                if int(nominee_id) in members
+            }
 
             # Sort votes and filter valid members
             valid_winners = []
             max_votes = 0
 
-            for nominee_id, votes in nominee_votes.items():
-                member = guild.get_member(int(nominee_id))
-                if member:
-                    if votes > max_votes:
-                        max_votes = votes
-                        valid_winners = [member]
-                    elif votes == max_votes:
-                        valid_winners.append(member)
-                else:
-                    logger.warning(f"Invalid member ID in votes: {nominee_id}")
-
-            # Create embed with results
-            embed = discord.Embed(title="Verkiezingen Resultaten", color=0x00FF00)
-
-            # Add all nominees to embed (even if they left the server)
-            for nominee_id, votes in sorted(
-                nominee_votes.items(), key=lambda item: item[1], reverse=True
-            ):
-                member = guild.get_member(int(nominee_id))
-                display_name = (
-                    member.display_name if member else f"Unknown Member ({nominee_id})"
-                )
-                percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-                embed.add_field(
-                    name=display_name,
-                    value=f"Stemmen: {votes} ({percentage:.2f}%)",
-                    inline=False,
+            if settings.BALLOT_MODE == "ranked":
+                winners, rounds = instant_runoff(
+                    rankings_matrix(rankings.values(), candidate_ids), len(candidate_ids)
                 )
+                if rankings:
+                    for winner in winners:
+                        member = members.get(int(candidate_ids[winner]))
+                        if member:
+                            valid_winners.append(member)
+                        else:
+                            logger.warning(
+                                f"Invalid member ID in votes: {candidate_ids[winner]}"
+                            )
+                    max_votes = rounds[-1]["counts"][winners[0]] if winners else 0
+            else:
+                for nominee_id in nominee_votes:
+                    if nominee_id not in display_names:
+                        logger.warning(f"Invalid member ID in votes: {nominee_id}")
+                winner_ids, max_votes = plurality_winners(nominee_votes, display_names)
+                valid_winners = [members[int(nominee_id)] for nominee_id in winner_ids]
+
+            # Results table fields (even for nominees who left the server)
+            fields = result_fields(nominee_votes, display_names)
+            if settings.BALLOT_MODE == "ranked" and rankings:
+                fields += runoff_fields(rounds, candidate_ids, display_names)
+            result = {
+                "winners": [str(winner.id) for winner in valid_winners],
+                "max_votes": max_votes,
+                "fields": [list(field) for field in fields],
+            }
+            election = self.schedule_data.get("last_election")
+            self.last_result = {
+                "election": election.isoformat() if election else None,
+                "ballot_mode": settings.BALLOT_MODE,
+                "winners": result["winners"],
+                "max_votes": max_votes,
+                "tally": [
+                    {
+                        "id": nominee_id,
+                        "name": display_names.get(nominee_id),
+                        "votes": votes,
+                    }
+                    for nominee_id, votes in sorted(
+                        nominee_votes.items(), key=lambda item: item[1], reverse=True
+                    )
+                ],
+            }
+            self._save_last_result()
 
             # Manage dictator role
-            dictator_role = guild.get_role(settings.DICTATOR_ROLE_ID)
+            dictator_role = guild.get_role(self.config.role_id)
             if not dictator_role:
                 await channel.send("Dictator role not found!")
                 return
 
             try:
-                # Remove role from current holders
-                current_dictators = [
-                    m for m in guild.members if dictator_role in m.roles
-                ]
-                for member in current_dictators:
-                    await member.remove_roles(
-                        dictator_role, reason="Election concluded"
-                    )
-
-                # Assign to valid winners
+                # Announce the valid winners
                 result_message = "@everyone "
                 if valid_winners:
-                    for winner in valid_winners:
-                        await winner.add_roles(dictator_role, reason="Election winner")
-
                     if len(valid_winners) == 1:
                         result_message += f"🏆 Jullie nieuwe dictator is: {valid_winners[0].mention} met {max_votes} stemmen!"
                     else:
@@ -305,10 +506,58 @@ class ElectionBot(commands.Bot):
                 else:
                     result_message = "⚠️ No valid winners found!"
 
-                await channel.send(result_message, embed=embed)
+                # The announcement goes out first, ahead of role changes and the table
+                await channel.send(result_message)
+
+                # Role holders come straight from the role, not a scan of guild.members;
+                # the recorded holders cover a lean or uncached member list
+                holder_ids = {m.id for m in dictator_role.members} | (self.dictator_ids or set())
+                with metrics.RESULT_PHASE_SECONDS.time(phase="role_changes"):
+                    if settings.LEAN_MEMBER_CACHE and self.dictator_ids is None:
+                        # No record yet (first lean election): find the holders once
+                        # by scanning the member list; later elections use the record
+                        holder_ids |= {
+                            m.id
+                            for m in await fetch_role_holders(
+                                guild, dictator_role.id, self.member_cache
+                            )
+                        }
+                    current_dictators = await resolve_members(
+                        guild, holder_ids, self.member_cache
+                    )
+                    failures = await reassign_role(
+                        dictator_role,
+                        list(current_dictators.values()),
+                        valid_winners,
+                        settings.ROLE_UPDATE_CONCURRENCY,
+                    )
+                failed = {(member.id, action) for member, action, _ in failures}
+                new_dictators = [
+                    w for w in valid_winners if (w.id, "add") not in failed
+                ] + [
+                    m
+                    for m in current_dictators.values()
+                    if (m.id, "remove") in failed
+                ]
+                self.dictator_ids = {m.id for m in new_dictators}
+                self._save_dictator_ids()
+                self.member_cache.remember_role_holders(new_dictators)
+
+                if failures:
+                    if all(isinstance(e, discord.Forbidden) for _, _, e in failures):
+                        await channel.send("❌ Missing permissions to manage roles!")
+                    else:
+                        failed_members = ", ".join(
+                            f"{member.mention} ({action})" for member, action, _ in failures
+                        )
+                        await channel.send(
+                            f"⚠️ Could not update the dictator role for: {failed_members}"
+                        )
+
+                # As many embeds and messages as Discord's size limits need
+                with metrics.RESULT_PHASE_SECONDS.time(phase="embed_send"):
+                    await send_embeds(channel, build_results_embeds(fields))
 
-            except discord.Forbidden:
-                await channel.send("❌ Missing permissions to manage roles!")
             except Exception as e:
                 logger.error(f"Election error: {str(e)}", exc_info=True)
                 await channel.send("⚠️ Error processing results!")
@@ -318,121 +567,529 @@ class ElectionBot(commands.Bot):
                 f"Critical error in election processing: {str(e)}", exc_info=True
             )
         finally:
-            nominees.clear_nominations()
-            nominees.clear_votes()
+            await self.archive_election(ballots, display_names, result)
+            self.nominees.clear_nominations()
+            self.nominees.clear_votes()
+            self.member_cache.clear_cycle()
             await self.schedule_elections()
 
+    async def archive_election(self, ballots, display_names, result):
+        """Write this cycle's nominees and ballots to the guild's election archive."""
+        if not settings.ELECTION_ARCHIVE or not self.nominees.get_nominations():
+            return
+        votes, rankings = ballots
+        ranked = settings.BALLOT_MODE == "ranked"
+        election = self.schedule_data.get("last_election") or datetime.datetime.now()
+        header = {
+            "guild": self.guild_id,
+            "election": election.isoformat(),
+            "ballot_mode": settings.BALLOT_MODE,
+            "nominees": self.nominees.get_nominations(),
+            "display_names": display_names,
+            "tally_order": list(votes.tally()),
+            "ballots": len(rankings) if ranked else len(votes),
+            "result": result,
+        }
+        if ranked:
+            rows = ((voter_id, *ranking) for voter_id, ranking in rankings.items())
+        else:
+            rows = votes.items()
+        path = archive_path(self._path("archive"), election)
+        try:
+            # Millions of rows compress off the event loop
+            await asyncio.to_thread(write_archive, path, header, rows)
+            logger.info(f"Archived election {header['election']} to {path}")
+        except Exception as e:
+            logger.error(f"Failed to archive election: {str(e)}", exc_info=True)
+
+    async def throttle_vote(self, interaction):
+        """Reply and return True when the voter is changing their ballot too fast."""
+        retry_after = self.vote_limiter.throttle(interaction.user.id)
+        if not retry_after:
+            return False
+        metrics.VOTES_THROTTLED.inc()
+        await interaction.response.send_message(
+            f"You're changing your vote too quickly. Try again in {math.ceil(retry_after)}s.",
+            ephemeral=True,
+        )
+        return True
+
+    def _status_changed(self):
+        # The next status request rebuilds the snapshot
+        self._status = None
+
+    def status_snapshot(self):
+        """The current StatusSnapshot, rebuilt only after the state changed."""
+        nominations = self.nominees.get_nominations()
+        # The nominee list is a new tuple whenever a nominee is added or cleared
+        if self._status is None or self._status_nominations is not nominations:
+            self._status = StatusSnapshot(self._status_data(nominations))
+            self._status_nominations = nominations
+        return self._status
+
+    def _status_data(self, nominations):
+        if self.ballot is not None:
+            phase = "voting"
+        elif self.nominees.is_nomination_period_open():
+            phase = "nominations"
+        elif "nomination_close" in self.schedule_data:
+            phase = "nominations_closed"
+        else:
+            phase = "scheduled"
+        return {
+            "guild": str(self.guild_id),
+            "phase": phase,
+            "election": self.schedule_data["last_election"].isoformat()
+            if "last_election" in self.schedule_data
+            else None,
+            "schedule": {
+                key: int(when.timestamp()) for key, when in self.schedule_data.items()
+            },
+            "nominees": [
+                {"id": nominee_id, "name": name} for nominee_id, name in nominations
+            ],
+            "results": self.last_result,
+        }
+
+
+class ElectionBot(BotBase):
+    def __init__(self):
+        intents = discord.Intents.default()
+        intents.members = True
+        intents.message_content = True
+        if settings.LEAN_MEMBER_CACHE:
+            # No presences and no discord.py member cache: the members the
+            # election reads are kept in each election's member_cache and fetched on demand
+            member_cache_flags = discord.MemberCacheFlags.none()
+        else:
+            intents.presences = True
+            member_cache_flags = discord.MemberCacheFlags.from_intents(intents)
+        shard_options = {}
+        if settings.SHARD_COUNT:
+            shard_options = {
+                "shard_count": settings.SHARD_COUNT,
+                "shard_ids": settings.SHARD_IDS,
+            }
+        super().__init__(
+            command_prefix=".",
+            intents=intents,
+            member_cache_flags=member_cache_flags,
+            chunk_guilds_at_startup=not settings.LEAN_MEMBER_CACHE,
+            **shard_options,
+        )
+        self.scheduler = create_scheduler(
+            # Per-guild job stores replace the shared one when several guilds are configured
+            "" if settings.GUILD_CONFIG_FILE else settings.SCHEDULER_DB_URL,
+            settings.SCHEDULER_MISFIRE_GRACE_TIME,
+        )
+        set_job_target(self)
+        self.scheduler.add_listener(self._on_job_submitted, EVENT_JOB_SUBMITTED)
+        self.http_server = None
+        # Status of every election, cached with the snapshots it was built from
+        self._status_index = None
+        self._status_index_parts = None
+
+        # One election per configured guild on this process's shards
+        self.elections = {}
+        for config in load_guild_configs(
+            settings.GUILD_CONFIG_FILE,
+            settings.GUILD_DATA_DIR,
+            settings.GUILDS_ID,
+            settings.CHANNEL_ID,
+            settings.DICTATOR_ROLE_ID,
+        ):
+            if settings.SHARD_COUNT and settings.SHARD_IDS is not None:
+                if shard_id(config.guild_id, settings.SHARD_COUNT) not in settings.SHARD_IDS:
+                    continue
+            if config.jobstore != "default":
+                self.scheduler.add_jobstore(
+                    create_jobstore(
+                        settings.SCHEDULER_DB_URL,
+                        config.directory,
+                        tablename=f"apscheduler_jobs_{config.guild_id}",
+                    ),
+                    alias=config.jobstore,
+                )
+            self.elections[config.guild_id] = GuildElection(self, config)
+        if not self.elections:
+            logger.warning("No configured guilds on this process's shards")
+            return
+
+        # Register commands directly in the class
+        guilds = [election.guild_object for election in self.elections.values()]
+        self.tree.command(
+            name="nominateme", description="Nominate yourself", guilds=guilds
+        )(self.nominateme)
+        self.tree.command(
+            name="force_start_nominations",
+            description="ADMIN: Start nomination period immediately",
+            guilds=guilds,
+        )(self.force_start_nominations)
+
+        self.tree.command(
+            name="force_start_voting",
+            description="ADMIN: Start voting period immediately",
+            guilds=guilds,
+        )(self.force_start_voting)
+
+        self.tree.command(
+            name="force_end_election",
+            description="ADMIN: End election immediately",
+            guilds=guilds,
+        )(self.force_end_election)
+
+        if settings.BALLOT_MODE == "ranked":
+            rank_command = self.tree.command(
+                name="rank",
+                description="Rank the nominees, most preferred first",
+                guilds=guilds,
+            )(self.rank)
+            for choice in RANK_CHOICES:
+                rank_command.autocomplete(choice)(self.vote_autocomplete)
+        else:
+            vote_command = self.tree.command(
+                name="vote", description="Vote for a nominee", guilds=guilds
+            )(self.vote)
+            vote_command.autocomplete("nominee")(self.vote_autocomplete)
+            app_commands.describe(nominee="The nominee to vote for")(vote_command)
+
+        self.tree.command(
+            name="schedule",
+            description="View the election schedule",
+            guilds=guilds,
+        )(self.view_schedule)
+
+    def election(self, guild_id=None):
+        """The election of ``guild_id``; the first configured guild for None."""
+        if guild_id is None:
+            return next(iter(self.elections.values()))
+        return self.elections[guild_id]
+
+    def election_for(self, interaction):
+        # Also tags the handler's log records with the interaction and guild
+        set_log_context(interaction=interaction.id, guild=interaction.guild_id)
+        return self.elections[interaction.guild_id]
+
+    async def setup_hook(self):
+        with log_duration("storage writer"):
+            for election in self.elections.values():
+                election.nominees.start_writer()
+
+        with log_duration("ballot view"):
+            for election in self.elections.values():
+                election.restore_ballot()
+
+        with log_duration("http server"):
+            await self._start_http_server()
+
+        with log_duration("command tree sync"):
+            for election in self.elections.values():
+                await self._sync_command_tree(election)
+
+        with log_duration("scheduler"):
+            self.scheduler.start()
+            for election in self.elections.values():
+                await election.start_schedule()
+
+    def _command_tree_fingerprint(self, election):
+        payload = []
+        for command in self.tree.get_commands(guild=election.guild_object):
+            try:
+                payload.append(command.to_dict(self.tree))
+            except TypeError:  # discord.py < 2.4 takes no tree argument
+                payload.append(command.to_dict())
+        payload.sort(key=lambda command: command["name"])
+        data = json.dumps(
+            {"guild": election.guild_id, "commands": payload},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    async def _sync_command_tree(self, election):
+        # Syncing is a rate-limited round trip; skip it when nothing changed
+        fingerprint = self._command_tree_fingerprint(election)
+        fingerprint_file = os.path.join(election.config.directory, "command_tree.sha256")
+        try:
+            with open(fingerprint_file, "r") as f:
+                synced_fingerprint = f.read().strip()
+        except FileNotFoundError:
+            synced_fingerprint = None
+
+        if fingerprint == synced_fingerprint and not settings.FORCE_COMMAND_SYNC:
+            logger.info(f"Command tree of guild {election.guild_id} unchanged, skipping sync")
+            return
+
+        await self.tree.sync(guild=election.guild_object)
+        with open(fingerprint_file, "w") as f:
+            f.write(fingerprint)
+
+    def status_index(self):
+        """A StatusSnapshot listing the status of every election."""
+        parts = tuple(election.status_snapshot() for election in self.elections.values())
+        if self._status_index_parts != parts:
+            self._status_index = StatusSnapshot({"guilds": [part.data for part in parts]})
+            self._status_index_parts = parts
+        return self._status_index
+
+    async def _start_http_server(self):
+        metrics.VOTES.set_function(
+            lambda: sum(e.nominees.vote_count() for e in self.elections.values())
+        )
+        metrics.NOMINEES.set_function(
+            lambda: sum(e.nominees.nominee_count() for e in self.elections.values())
+        )
+        metrics.WRITE_QUEUE_DEPTH.set_function(
+            lambda: sum(e.nominees.pending_writes() for e in self.elections.values())
+        )
+        if not settings.METRICS_PORT:
+            return
+        self.http_server = LocalHttpServer(settings.METRICS_HOST, settings.METRICS_PORT)
+        self.http_server.route("/metrics", metrics.metrics_route)
+        self.http_server.route("/status", snapshot_route(self.status_index))
+        for election in self.elections.values():
+            self.http_server.route(
+                f"/status/{election.guild_id}", snapshot_route(election.status_snapshot)
+            )
+        await self.http_server.start()
+
+    def _on_job_submitted(self, event):
+        lag = datetime.datetime.now(datetime.timezone.utc) - max(
+            event.scheduled_run_times
+        )
+        metrics.JOB_LAG_SECONDS.observe(lag.total_seconds(), job=event.job_id)
+
+    async def close(self):
+        if self.http_server:
+            await self.http_server.stop()
+        # Flush queued nominee and vote writes before disconnecting
+        for election in self.elections.values():
+            await election.nominees.close()
+        await super().close()
+
     async def nominateme(self, interaction: discord.Interaction):
-        candidate = interaction.user
-        if not nominees.is_nomination_period_open():
+        election = self.election_for(interaction)
+        with InteractionTimer("nominateme", interaction):
+            candidate = interaction.user
+            if not election.nominees.is_nomination_period_open():
+                await interaction.response.send_message(
+                    "The nomination period is closed.", ephemeral=True
+                )
+                return
+            if election.nominees.is_candidate_nominated(candidate):
+                await interaction.response.send_message(
+                    f"{candidate.display_name} is already nominated.", ephemeral=True
+                )
+                return
+
+            election.nominees.nominate_candidate(candidate)
+            election.member_cache.remember(candidate)
             await interaction.response.send_message(
-                "The nomination period is closed.", ephemeral=True
+                f"{candidate.display_name} has been nominated."
             )
-            return
-        if nominees.is_candidate_nominated(candidate):
+
+    async def vote(self, interaction: discord.Interaction, nominee: str):
+        election = self.election_for(interaction)
+        with InteractionTimer("vote", interaction):
+            if election.ballot is None:
+                await interaction.response.send_message(
+                    "Voting is not open.", ephemeral=True
+                )
+                return
+            if nominee not in election.ballot:
+                await interaction.response.send_message(
+                    "Pick a nominee from the list.", ephemeral=True
+                )
+                return
+            if await election.throttle_vote(interaction):
+                return
+
+            election.nominees.record_vote(interaction.user, nominee)
+            election.member_cache.remember(interaction.user)
             await interaction.response.send_message(
-                f"{candidate.display_name} is already nominated.", ephemeral=True
+                f"You selected {election.ballot.names[nominee]}", ephemeral=True
             )
-            return
 
-        nominees.nominate_candidate(candidate)
-        await interaction.response.send_message(
-            f"{candidate.display_name} has been nominated."
-        )
+    async def rank(
+        self,
+        interaction: discord.Interaction,
+        first: str,
+        second: Optional[str] = None,
+        third: Optional[str] = None,
+        fourth: Optional[str] = None,
+        fifth: Optional[str] = None,
+    ):
+        election = self.election_for(interaction)
+        with InteractionTimer("rank", interaction):
+            if election.ballot is None:
+                await interaction.response.send_message(
+                    "Voting is not open.", ephemeral=True
+                )
+                return
+            ranking = [
+                nominee for nominee in (first, second, third, fourth, fifth) if nominee
+            ]
+            if any(nominee not in election.ballot for nominee in ranking):
+                await interaction.response.send_message(
+                    "Pick nominees from the list.", ephemeral=True
+                )
+                return
+            if len(set(ranking)) != len(ranking):
+                await interaction.response.send_message(
+                    "Each nominee can only be ranked once.", ephemeral=True
+                )
+                return
+            if await election.throttle_vote(interaction):
+                return
+
+            election.nominees.record_ranking(interaction.user, ranking)
+            election.member_cache.remember(interaction.user)
+            ranking_text = "\n".join(
+                f"{position}. {election.ballot.names[nominee]}"
+                for position, nominee in enumerate(ranking, start=1)
+            )
+            await interaction.response.send_message(
+                f"Your ranking:\n{ranking_text}", ephemeral=True
+            )
+
+    async def vote_autocomplete(self, interaction: discord.Interaction, current: str):
+        election = self.elections.get(interaction.guild_id)
+        if election is None or election.ballot is None:
+            return []
+        return election.ballot.search(current)
 
     @app_commands.checks.has_permissions(administrator=True)
     async def force_start_nominations(self, interaction: discord.Interaction):
         """Admin command to start nominations"""
-        await interaction.response.defer(ephemeral=True)
-        await self.open_nominations()
-        await interaction.followup.send("🗳️ Nomination period started!", ephemeral=True)
+        election = self.election_for(interaction)
+        with InteractionTimer("force_start_nominations", interaction) as timer:
+            await interaction.response.defer(ephemeral=True)
+            timer.acknowledged()
+            await election.open_nominations()
+            await interaction.followup.send("🗳️ Nomination period started!", ephemeral=True)
 
     @app_commands.checks.has_permissions(administrator=True)
     async def force_start_voting(self, interaction: discord.Interaction):
         """Admin command to start voting"""
-        await interaction.response.defer(ephemeral=True)
-        await self.close_nominations()
-        await self.start_voting()
-        await interaction.followup.send("✅ Voting period started!", ephemeral=True)
+        election = self.election_for(interaction)
+        with InteractionTimer("force_start_voting", interaction) as timer:
+            await interaction.response.defer(ephemeral=True)
+            timer.acknowledged()
+            await election.close_nominations()
+            await election.start_voting()
+            await interaction.followup.send("✅ Voting period started!", ephemeral=True)
 
     @app_commands.checks.has_permissions(administrator=True)
     async def force_end_election(self, interaction: discord.Interaction):
         """Admin command to end election"""
-        await interaction.response.defer(ephemeral=True)
-        await self.end_voting()
-        await interaction.followup.send("🏁 Election concluded!", ephemeral=True)
-
-    def _format_schedule_date(self, date_key, friendly_name):
-        if date_key in self.schedule_data:
-            timestamp = int(self.schedule_data[date_key].timestamp())
-            return f"📅 {friendly_name}: <t:{timestamp}:F> (<t:{timestamp}:R>)\n"
-        return ""
+        election = self.election_for(interaction)
+        with InteractionTimer("force_end_election", interaction) as timer:
+            await interaction.response.defer(ephemeral=True)
+            timer.acknowledged()
+            await election.end_voting()
+            await interaction.followup.send("🏁 Election concluded!", ephemeral=True)
 
     async def view_schedule(self, interaction: discord.Interaction):
         """Command to view the election schedule"""
-        schedule_text = "**Election Schedule**\n\n"
+        election = self.election_for(interaction)
+        with InteractionTimer("schedule", interaction):
+            await interaction.response.send_message(
+                election.status_snapshot().schedule_text
+            )
 
-        # Add scheduled events
-        schedule_text += self._format_schedule_date(
-            "nomination_start", "Nominations Start"
-        )
-        schedule_text += self._format_schedule_date(
-            "nomination_close", "Nominations Close"
+
+class ElectionSelect(discord.ui.Select):
+    def __init__(self, ballot, page=0, custom_id=None):
+        placeholder = "Select a nominee"
+        if ballot.page_count > 1:
+            placeholder += f" ({page + 1}/{ballot.page_count})"
+        kwargs = {"custom_id": custom_id} if custom_id else {}
+        super().__init__(
+            options=ballot.option_pages[page],
+            placeholder=placeholder,
+            max_values=1,
+            **kwargs,
         )
-        schedule_text += self._format_schedule_date("voting_start", "Voting Starts")
-        schedule_text += self._format_schedule_date("voting_end", "Voting Ends")
 
-        # Add next election info from schedule data
-        if "next_election" in self.schedule_data:
-            next_ts = int(self.schedule_data["next_election"].timestamp())
-            schedule_text += (
-                f"\n🔄 Next election cycle starts: <t:{next_ts}:F> (<t:{next_ts}:R>)"
+    async def callback(self, interaction: discord.Interaction):
+        election = interaction.client.election_for(interaction)
+        with InteractionTimer("ballot_select", interaction):
+            # Ballot pages stay clickable after voting has ended
+            if election.ballot is None:
+                await interaction.response.send_message(
+                    "Voting is not open.", ephemeral=True
+                )
+                return
+            if self.values[0] not in election.ballot:
+                await interaction.response.send_message(
+                    "Pick a nominee from the list.", ephemeral=True
+                )
+                return
+            if await election.throttle_vote(interaction):
+                return
+            selected_nominee_id = int(self.values[0])
+            election.nominees.record_vote(interaction.user, selected_nominee_id)
+            election.member_cache.remember(interaction.user)
+            # The nominee index already has the display name; no member lookup needed
+            selected_name = election.nominees.get_nominee_name(selected_nominee_id)
+            await interaction.response.send_message(
+                f"You selected {selected_name}", ephemeral=True
             )
-        else:
-            schedule_text += "\n❌ No previous election data found"
-
-        if not any(
-            key in self.schedule_data
-            for key in [
-                "nomination_start",
-                "nomination_close",
-                "voting_start",
-                "voting_end",
-            ]
-        ):
-            schedule_text += "\n⚠️ No active election schedule"
-
-        await interaction.response.send_message(schedule_text)
 
 
-class ElectionSelect(discord.ui.Select):
-    def __init__(self, nominee_list):
-        options = [
-            discord.SelectOption(label=nominee[1], value=str(nominee[0]))
-            for nominee in nominee_list
-        ]
-        super().__init__(options=options, placeholder="Select a nominee", max_values=1)
+class ElectionView(discord.ui.View):
+    """The public ballot; persistent so it keeps working across restarts."""
+
+    def __init__(self, ballot):
+        super().__init__(timeout=None)
+        self.ballot = ballot
+        self.add_item(ElectionSelect(ballot, custom_id="election:ballot"))
+        if ballot.page_count > 1:
+            browse = discord.ui.Button(
+                label=f"All {len(ballot.nominees)} nominees",
+                style=discord.ButtonStyle.secondary,
+                custom_id="election:browse",
+            )
+            browse.callback = self.browse
+            self.add_item(browse)
 
-    async def callback(self, interaction: discord.Interaction):
-        selected_nominee_id = int(self.values[0])
-        nominees.record_vote(interaction.user, selected_nominee_id)
-        selected_nominee = interaction.guild.get_member(selected_nominee_id)
+    async def browse(self, interaction: discord.Interaction):
         await interaction.response.send_message(
-            f"You selected {selected_nominee.display_name}", ephemeral=True
+            view=BallotPageView(self.ballot, 0), ephemeral=True
         )
 
 
-class ElectionView(discord.ui.View):
-    def __init__(self, nominee_list):
-        super().__init__(timeout=86400)  # 24 hours
-        self.add_item(ElectionSelect(nominee_list))
+class BallotPageView(discord.ui.View):
+    """Ephemeral, per-voter view over one page of a large ballot."""
+
+    def __init__(self, ballot, page):
+        super().__init__(timeout=900)
+        self.ballot = ballot
+        self.page = page
+        self.add_item(ElectionSelect(ballot, page))
+        self.previous_page.disabled = page == 0
+        self.next_page.disabled = page >= ballot.page_count - 1
 
-    async def on_timeout(self):
-        logger.info("ElectionView timed out")
-        self.clear_items()
+    @discord.ui.button(
+        label="◀ Previous", style=discord.ButtonStyle.secondary, row=1
+    )
+    async def previous_page(self, interaction: discord.Interaction, button):
+        await interaction.response.edit_message(
+            view=BallotPageView(self.ballot, self.page - 1)
+        )
+
+    @discord.ui.button(
+        label="Next ▶", style=discord.ButtonStyle.secondary, row=1
+    )
+    async def next_page(self, interaction: discord.Interaction, button):
+        await interaction.response.edit_message(
+            view=BallotPageView(self.ballot, self.page + 1)
+        )
 
 
 def run():
+    # All log output goes through one queue to a background writer thread
+    start_logging(settings.LOGGING_CONFIG)
     bot = ElectionBot()
 
     @bot.event
@@ -440,7 +1097,7 @@ def run():
         logger.info(f"User: {bot.user} (ID: {bot.user.id})")
         logger.info("Bot is ready to go!")
 
-    bot.run(settings.DISCORD_API_SECRET, root_logger=True)
+    bot.run(settings.DISCORD_API_SECRET, log_handler=None)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+
+import discord
+
+logger = logging.getLogger("bot")
+
+# Discord accepts at most 100 user ids per member query
+QUERY_BATCH_SIZE = 100
+
+
+class MemberCache:
+    """Members the election reads, for running without discord.py's member cache.
+
+    Holds nominees and voters seen this cycle plus dictator-role holders;
+    everything but the role holders is dropped when the cycle ends.
+    """
+
+    def __init__(self):
+        self._members = {}
+        self._role_holder_ids = set()
+
+    def __len__(self):
+        return len(self._members)
+
+    def get(self, member_id):
+        return self._members.get(member_id)
+
+    def remember(self, member):
+        if isinstance(member, discord.Member):
+            self._members[member.id] = member
+
+    def remember_role_holders(self, members):
+        self._role_holder_ids = {member.id for member in members}
+        for member in members:
+            self.remember(member)
+
+    def clear_cycle(self):
+        self._members = {
+            member_id: member
+            for member_id, member in self._members.items()
+            if member_id in self._role_holder_ids
+        }
+
+
+async def resolve_members(guild, member_ids, cache=None):
+    """Resolve member ids to ``discord.Member`` objects once.
+
+    Members in ``cache`` or discord.py's cache are used as-is; only the
+    missing ids are requested, in batches over the gateway, with a per-id
+    REST fallback when gateway queries are unavailable. Members who left
+    the server are omitted from the returned ``{member_id: member}`` dict.
+    """
+    resolved = {}
+    missing = []
+    for member_id in dict.fromkeys(member_ids):
+        member = (cache and cache.get(member_id)) or guild.get_member(member_id)
+        if member:
+            resolved[member_id] = member
+        else:
+            missing.append(member_id)
+
+    for start in range(0, len(missing), QUERY_BATCH_SIZE):
+        batch = missing[start : start + QUERY_BATCH_SIZE]
+        try:
+            members = await guild.query_members(user_ids=batch, limit=len(batch))
+        except (discord.ClientException, asyncio.TimeoutError) as e:
+            logger.info(f"Member query unavailable ({e}), fetching members one by one")
+            members = await _fetch_members(guild, batch)
+        for member in members:
+            resolved[member.id] = member
+            if cache is not None:
+                cache.remember(member)
+    return resolved
+
+
+async def fetch_role_holders(guild, role_id, cache=None):
+    """Return every member holding ``role_id`` by scanning the member list.
+
+    Without discord.py's member cache ``role.members`` is always empty, so
+    the holders can only be found by paging through the guild's members
+    over REST, 1000 per request.
+    """
+    holders = []
+    async for member in guild.fetch_members(limit=None):
+        if member.get_role(role_id):
+            holders.append(member)
+            if cache is not None:
+                cache.remember(member)
+    return holders
+
+
+async def _fetch_members(guild, member_ids):
+    outcomes = await asyncio.gather(
+        *(guild.fetch_member(member_id) for member_id in member_ids),
+        return_exceptions=True,
+    )
+    members = []
+    for member_id, outcome in zip(member_ids, outcomes):
+        if isinstance(outcome, discord.NotFound):
+            continue
+        if isinstance(outcome, Exception):
+            logger.warning(f"Failed to fetch member {member_id}: {outcome}")
+            continue
+        members.append(outcome)
+    return members
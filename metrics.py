@@ -0,0 +1,206 @@
+"""In-process counters, gauges and histograms in Prometheus text format.
+
+Updates are plain dict operations on the event loop, cheap enough to leave
+on in production; render() produces the text served on /metrics.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+
+REGISTRY = []
+
+# Seconds; spans fast in-memory handlers up to slow REST round trips
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = list(zip(labelnames, key)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += self._samples()
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self._function = function
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """Read the value from ``function()`` whenever metrics are rendered."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            return [f"{self.name} {self._function()}"]
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # Per-bucket counts (plus +Inf), sum, count
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, [("le", le)])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+def metrics_route(headers):
+    return 200, {"Content-Type": "text/plain; version=0.0.4"}, render().encode()
+
+
+INTERACTION_ACK_SECONDS = Histogram(
+    "election_interaction_ack_seconds",
+    "Time from interaction creation to the bot's first response",
+    ["handler"],
+)
+INTERACTION_HANDLER_SECONDS = Histogram(
+    "election_interaction_handler_seconds",
+    "Total time spent in an interaction handler",
+    ["handler"],
+)
+INTERACTIONS = Counter(
+    "election_interactions_total", "Interactions handled", ["handler"]
+)
+STORAGE_FLUSH_SECONDS = Histogram(
+    "election_storage_flush_seconds", "Time to flush one batch of queued storage writes"
+)
+STORAGE_OPERATIONS = Counter(
+    "election_storage_operations_total", "Storage operations flushed", ["operation"]
+)
+JOB_LAG_SECONDS = Histogram(
+    "election_job_lag_seconds",
+    "Delay between a scheduler job's scheduled and actual run time",
+    ["job"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 3600.0, 86400.0),
+)
+RESULT_PHASE_SECONDS = Histogram(
+    "election_result_phase_seconds",
+    "Time spent in each phase of processing election results",
+    ["phase"],
+)
+VOTES_THROTTLED = Counter(
+    "election_votes_throttled_total", "Ballot changes rejected by the per-voter rate limit"
+)
+VOTES = Gauge("election_votes", "Voters with a recorded vote")
+NOMINEES = Gauge("election_nominees", "Nominated candidates")
+WRITE_QUEUE_DEPTH = Gauge("election_write_queue_depth", "Storage writes waiting to be flushed")
+
+
+class InteractionTimer:
+    """Times one interaction handler; use as ``with InteractionTimer(name, interaction)``.
+
+    Handlers that defer early call acknowledged() right after deferring;
+    otherwise the acknowledgement is taken to be the end of the handler.
+    """
+
+    def __init__(self, handler, interaction):
+        self.handler = handler
+        self.interaction = interaction
+        self._acknowledged = False
+
+    def acknowledged(self):
+        if not self._acknowledged:
+            self._acknowledged = True
+            created = self.interaction.created_at.timestamp()
+            INTERACTION_ACK_SECONDS.observe(
+                max(time.time() - created, 0.0), handler=self.handler
+            )
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        INTERACTIONS.inc(handler=self.handler)
+        INTERACTION_HANDLER_SECONDS.observe(
+            time.perf_counter() - self._start, handler=self.handler
+        )
+        if self.interaction.response.is_done():
+            self.acknowledged()
+        return False
@@ -1,12 +1,45 @@
-import csv
-import os
+import asyncio
+import logging
+
+import metrics
+from storage import CsvStorage
+from votestore import VoteStore
+
+logger = logging.getLogger("bot")
+
+# A failed storage flush is retried with exponential backoff between these
+# delays (seconds); at shutdown it is given up after this many attempts
+WRITE_RETRY_MIN_SECONDS = 1
+WRITE_RETRY_MAX_SECONDS = 30
+WRITE_RETRY_ATTEMPTS_ON_STOP = 5
+
 
 class Nomination:
-    def __init__(self):
-        self.csv_file = "nominees.csv"
-        self.votes_csv = "votes.csv"
+    def __init__(self, storage=None, coalesce_window=0):
+        self.storage = storage if storage is not None else CsvStorage()
         self.nomination_period_open = False
-    
+        # Live votes and per-nominee counts, keyed by integer voter id
+        self._votes, self._journal_appends = self.storage.load_votes()
+        # Ranked ballots: voter id -> nominee ids, most preferred first
+        self._rankings, self._ranking_appends = self.storage.load_rankings()
+        # Bumped on every tally change so readers can skip unchanged snapshots
+        self.tally_version = 0
+        # Ordered nominee index: candidate id -> display name, in nomination order
+        self._nominees = {}
+        self._nomination_list = None
+        for candidate_id, display_name in self.storage.load_nominations():
+            self._add_nominee(candidate_id, display_name)
+        # Single-writer persistence: state changes in memory on the event loop,
+        # storage writes are queued and flushed in batches from a worker thread
+        self._write_queue = None
+        self._writer_task = None
+        # Vote changes wait this many seconds so repeated changes reach storage
+        # once with the last choice; the in-memory tally is updated immediately
+        self.coalesce_window = coalesce_window
+        self._pending_votes = {}
+        self._pending_rankings = {}
+        self._coalesce_handle = None
+
     def open_nomination_period(self):
         self.nomination_period_open = True
 
@@ -16,70 +49,204 @@ class Nomination:
     def is_nomination_period_open(self):
         return self.nomination_period_open
 
-    def check_and_create_file(self, file_path):
-        if not os.path.exists(file_path):
-            open(file_path, 'w').close()
+    def start_writer(self):
+        if self._writer_task is None:
+            self._write_queue = asyncio.Queue()
+            self._writer_task = asyncio.create_task(self._run_writer())
+
+    async def stop_writer(self):
+        """Flush every queued write and stop the writer task."""
+        if self._writer_task is None:
+            return
+        self.flush_votes()
+        self._write_queue.put_nowait(None)
+        await self._writer_task
+        self._writer_task = None
+        self._write_queue = None
+
+    async def close(self):
+        await self.stop_writer()
+        self.storage.close()
+
+    def _persist(self, operation):
+        if self._writer_task is None:
+            # No event loop writer (scripts, startup): write through directly
+            self._flush([operation])
+        else:
+            self._write_queue.put_nowait(operation)
+
+    async def _run_writer(self):
+        batch = []
+        stopping = False
+        delay = WRITE_RETRY_MIN_SECONDS
+        attempts = 0
+        while True:
+            if not batch and not stopping:
+                batch.append(await self._write_queue.get())
+            while not self._write_queue.empty():
+                batch.append(self._write_queue.get_nowait())
+            stopping = stopping or None in batch
+            batch = [operation for operation in batch if operation is not None]
+            if batch:
+                try:
+                    with metrics.STORAGE_FLUSH_SECONDS.time():
+                        await asyncio.to_thread(self._flush, batch)
+                except Exception as e:
+                    attempts += 1
+                    if stopping and attempts >= WRITE_RETRY_ATTEMPTS_ON_STOP:
+                        logger.critical(
+                            f"Giving up on {len(batch)} queued writes at shutdown: {str(e)}",
+                            exc_info=True,
+                        )
+                        return
+                    # Keep the batch, ahead of anything queued since, and retry it
+                    logger.error(
+                        f"Failed to persist election state, retrying in {delay}s: {str(e)}",
+                        exc_info=True,
+                    )
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, WRITE_RETRY_MAX_SECONDS)
+                    continue
+                for operation, _ in batch:
+                    metrics.STORAGE_OPERATIONS.inc(operation=operation)
+                batch = []
+                delay = WRITE_RETRY_MIN_SECONDS
+                attempts = 0
+            if stopping:
+                return
+
+    def _flush(self, batch):
+        merged = []
+        for operation, rows in batch:
+            # Consecutive appends of the same kind share one storage write
+            appending = operation in ('add_nominations', 'add_votes', 'add_rankings')
+            if appending and merged and merged[-1][0] == operation:
+                merged[-1][1].extend(rows)
+            else:
+                merged.append((operation, list(rows) if appending else rows))
+        self.storage.apply(merged)
 
     def nominate_candidate(self, candidate):
-        self.check_and_create_file(self.csv_file)
-        with open(self.csv_file, mode='a', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([candidate.id, candidate.display_name])
+        self._persist(('add_nominations', [(str(candidate.id), candidate.display_name)]))
+        self._add_nominee(str(candidate.id), candidate.display_name)
+
+    def _add_nominee(self, candidate_id, display_name):
+        if candidate_id not in self._nominees:
+            self._nominees[candidate_id] = display_name
+            self._nomination_list = None
 
     def get_nominations(self):
-        self.check_and_create_file(self.csv_file)
-        nominations = []
-        with open(self.csv_file, mode='r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) > 1:  # Ensure there are enough elements in the row
-                    nominations.append((row[0], row[1]))
-        return nominations
+        # Cached until the nominee index changes, so ballots can share it
+        if self._nomination_list is None:
+            self._nomination_list = tuple(self._nominees.items())
+        return self._nomination_list
+
+    def get_nominee_name(self, candidate_id):
+        return self._nominees.get(str(candidate_id))
 
     def clear_nominations(self):
-        self.check_and_create_file(self.csv_file)
-        open(self.csv_file, 'w').close()  # Clear the contents of the CSV file
+        self._persist(('clear_nominations', None))
+        self._nominees = {}
+        self._nomination_list = None
 
     def is_candidate_nominated(self, candidate):
-        self.check_and_create_file(self.csv_file)
-        with open(self.csv_file, mode='r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) > 0 and row[0] == str(candidate.id):
-                    return True
-        return False
-    
+        return str(candidate.id) in self._nominees
+
     def clear_votes(self):
-        self.check_and_create_file(self.votes_csv)
-        open(self.votes_csv, 'w').close()
+        if self._coalesce_handle is not None:
+            self._coalesce_handle.cancel()
+            self._coalesce_handle = None
+        self._pending_votes = {}
+        self._pending_rankings = {}
+        self._persist(('clear_votes', None))
+        self._journal_appends = 0
+        self._ranking_appends = 0
+        self._votes = VoteStore()
+        self._rankings = {}
+        self.tally_version += 1
 
     def record_vote(self, voter, nominee_id):
-        self.check_and_create_file(self.votes_csv)
-        rows = []
+        voter_id = int(voter.id)
+        nominee_id = str(nominee_id)
+        self._pending_votes[voter_id] = nominee_id
+        self._schedule_vote_flush()
+        self._apply_vote(voter_id, nominee_id)
+
+    def record_ranking(self, voter, nominee_ids):
+        """Record a ranked ballot; its first choice also counts in the live tally."""
         voter_id = str(voter.id)
-        with open(self.votes_csv, mode='r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) > 0 and row[0] != voter_id:  # Skip rows for this voter
-                    rows.append(row)
-
-        # Write the new vote
-        with open(self.votes_csv, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow([voter_id, nominee_id])
-            for row in rows:
-                writer.writerow(row)
+        ranking = tuple(str(nominee_id) for nominee_id in nominee_ids)
+        self._pending_rankings[voter_id] = ranking
+        self._rankings[voter_id] = ranking
+        self.record_vote(voter, ranking[0])
+
+    def _schedule_vote_flush(self):
+        if self._writer_task is None or self.coalesce_window <= 0:
+            self.flush_votes()
+        elif self._coalesce_handle is None:
+            self._coalesce_handle = asyncio.get_running_loop().call_later(
+                self.coalesce_window, self.flush_votes
+            )
+
+    def flush_votes(self):
+        """Queue the votes held back by the coalescing window for storage."""
+        if self._coalesce_handle is not None:
+            self._coalesce_handle.cancel()
+            self._coalesce_handle = None
+        if self._pending_rankings:
+            rows = [(voter_id, *ranking) for voter_id, ranking in self._pending_rankings.items()]
+            self._pending_rankings = {}
+            self._persist(('add_rankings', rows))
+            if self.storage.journaled:
+                self._ranking_appends += len(rows)
+        if self._pending_votes:
+            rows = [
+                (str(voter_id), nominee_id)
+                for voter_id, nominee_id in self._pending_votes.items()
+            ]
+            self._pending_votes = {}
+            self._persist(('add_votes', rows))
+            if self.storage.journaled:
+                self._journal_appends += len(rows)
+
+    def ballot_snapshot(self):
+        """Copies of the votes and ranked ballots, to tally and archive the same ballots."""
+        return self._votes.copy(), dict(self._rankings)
+
+    def get_rankings(self):
+        return list(self._rankings.values())
+
+    def _apply_vote(self, voter_id, nominee_id):
+        if self._votes.set(voter_id, nominee_id) != nominee_id:
+            self.tally_version += 1
 
     def get_votes(self):
-        self.check_and_create_file(self.votes_csv)
-        votes = {}
-        with open(self.votes_csv, mode='r') as file:
-            reader = csv.reader(file)
-            for row in reader:
-                if len(row) > 1:  # Ensure there are enough elements in the row
-                    nominee_id = row[1]
-                    if nominee_id not in votes:
-                        votes[nominee_id] = 1
-                    else:
-                        votes[nominee_id] += 1
-        return votes
\ No newline at end of file
+        return self._votes.tally()
+
+    def vote_count(self):
+        return len(self._votes)
+
+    def nominee_count(self):
+        return len(self._nominees)
+
+    def pending_writes(self):
+        return self._write_queue.qsize() if self._write_queue is not None else 0
+
+    def compact_votes(self):
+        """Queue a rewrite of the vote journals down to one row per voter."""
+        self.flush_votes()
+        if not self._journal_appends and not self._ranking_appends:
+            return False
+        # Snapshot now; votes queued after this are appended after the rewrite
+        if self._journal_appends:
+            self._persist(('compact_votes', self._votes.copy()))
+            self._journal_appends = 0
+        if self._ranking_appends:
+            self._persist(
+                (
+                    'compact_rankings',
+                    [(voter_id, *ranking) for voter_id, ranking in self._rankings.items()],
+                )
+            )
+            self._ranking_appends = 0
+        return True
@@ -0,0 +1,49 @@
+import time
+
+# Drop refilled buckets after this many calls so idle voters don't accumulate
+PRUNE_EVERY = 1024
+
+
+class TokenBucket:
+    """Per-key token buckets held in memory.
+
+    Every key starts with ``burst`` tokens and regains ``rate`` tokens per
+    second, up to ``burst``; each allowed action spends one token.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        # key -> (tokens, monotonic time of the last update)
+        self._buckets = {}
+        self._calls = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def throttle(self, key):
+        """Spend a token for ``key``; return 0 if allowed, else seconds to wait."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._calls += 1
+        if self._calls % PRUNE_EVERY == 0:
+            self._prune(now)
+
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[key] = (tokens - 1, now)
+        return 0.0
+
+    def _prune(self, now):
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * self.rate < self.burst
+        }
+
+    def clear(self):
+        self._buckets = {}
@@ -0,0 +1,129 @@
+"""Recount archived elections offline and check them against the announced results.
+
+Each archive is streamed once; identical ballots are counted together, so
+memory grows with the number of distinct ballots rather than the number
+of voters. The tally, winners and results embed text are recomputed with
+the same code the bot uses and compared with what was announced. Needs no
+Discord connection or token:
+
+    python recount.py guilds/*/archive/*.csv.gz --processes 4
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import sys
+
+from archive import open_archive, read_header
+from tally import (
+    instant_runoff,
+    plurality_winners,
+    rankings_matrix,
+    result_fields,
+    runoff_fields,
+)
+
+
+def count_ballots(file):
+    """Return {ballot: voters}; a ballot is the row without its voter id."""
+    counts = collections.Counter()
+    counts.update(line.rstrip("\r\n").partition(",")[2] for line in file)
+    counts.pop("", None)
+    return counts
+
+
+def recount(path):
+    with open_archive(path) as file:
+        header = read_header(file)
+        ballots = count_ballots(file)
+
+    display_names = header["display_names"]
+    # Ties are listed in the order of the announced tally
+    first_choices = collections.Counter()
+    for ballot, voters in ballots.items():
+        first_choices[ballot.partition(",")[0]] += voters
+    nominee_votes = {
+        nominee_id: first_choices[nominee_id]
+        for nominee_id in header["tally_order"]
+        if first_choices[nominee_id]
+    }
+    for nominee_id, votes in first_choices.items():
+        nominee_votes.setdefault(nominee_id, votes)
+
+    fields = result_fields(nominee_votes, display_names)
+    if header["ballot_mode"] == "ranked":
+        candidate_ids = [nominee_id for nominee_id, _ in header["nominees"]]
+        winner_ids, max_votes = [], 0
+        if ballots:
+            distinct = list(ballots)
+            winners, rounds = instant_runoff(
+                rankings_matrix((ballot.split(",") for ballot in distinct), candidate_ids),
+                len(candidate_ids),
+                weights=[ballots[ballot] for ballot in distinct],
+            )
+            winner_ids = [
+                candidate_ids[winner]
+                for winner in winners
+                if candidate_ids[winner] in display_names
+            ]
+            max_votes = rounds[-1]["counts"][winners[0]] if winners else 0
+            fields += runoff_fields(rounds, candidate_ids, display_names)
+    else:
+        winner_ids, max_votes = plurality_winners(nominee_votes, display_names)
+
+    recounted = {
+        "winners": winner_ids,
+        "max_votes": max_votes,
+        "fields": [list(field) for field in fields],
+    }
+    return {
+        "path": path,
+        "guild": header["guild"],
+        "election": header["election"],
+        "ballots": sum(ballots.values()),
+        "recount": recounted,
+        "announced": header["result"],
+        "matches": header["result"] == recounted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archives", nargs="+", help="archive files (.csv.gz)")
+    parser.add_argument(
+        "--processes", type=int, default=1, help="recount this many archives at once"
+    )
+    parser.add_argument("--json", action="store_true", help="print one JSON object per archive")
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        pool = multiprocessing.Pool(args.processes)
+        results = pool.imap(recount, args.archives)
+    else:
+        pool = None
+        results = map(recount, args.archives)
+
+    mismatches = 0
+    for result in results:
+        mismatches += not result["matches"]
+        if args.json:
+            print(json.dumps(result))
+            continue
+        status = "ok" if result["matches"] else "MISMATCH"
+        winners = ", ".join(result["recount"]["winners"]) or "none"
+        print(
+            f"{result['path']}: {result['ballots']} ballots, winners {winners} "
+            f"with {result['recount']['max_votes']} votes [{status}]"
+        )
+        if not result["matches"]:
+            print(f"  announced: {json.dumps(result['announced'])}")
+            print(f"  recount:   {json.dumps(result['recount'])}")
+    if pool is not None:
+        pool.close()
+        pool.join()
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+
+import discord
+
+from tally import result_fields
+
+logger = logging.getLogger("bot")
+
+# Discord's embed limits: fields per embed, characters per embed and per
+# message (all embeds together), embeds per message and field name length
+MAX_EMBED_FIELDS = 25
+MAX_EMBED_CHARACTERS = 6000
+MAX_MESSAGE_EMBEDS = 10
+MAX_FIELD_NAME_LENGTH = 256
+
+
+async def reassign_role(role, current_holders, winners, concurrency):
+    """Move ``role`` from its current holders to the winners concurrently.
+
+    Calls are bounded by ``concurrency``; discord.py's HTTP client queues
+    them per rate-limit bucket and retries 429s. Members who keep the role
+    are left alone. Returns a list of (member, action, exception) for every
+    call that failed instead of aborting the batch.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    winner_ids = {winner.id for winner in winners}
+    holder_ids = {holder.id for holder in current_holders}
+
+    async def update(member, action):
+        async with semaphore:
+            if action == "remove":
+                await member.remove_roles(role, reason="Election concluded")
+            else:
+                await member.add_roles(role, reason="Election winner")
+
+    calls = [
+        (member, "remove") for member in current_holders if member.id not in winner_ids
+    ] + [(member, "add") for member in winners if member.id not in holder_ids]
+    outcomes = await asyncio.gather(
+        *(update(member, action) for member, action in calls), return_exceptions=True
+    )
+
+    failures = []
+    for (member, action), outcome in zip(calls, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning(f"Failed to {action} role for {member.id}: {outcome}")
+            failures.append((member, action, outcome))
+    return failures
+
+
+def build_results_embeds(fields, title="Verkiezingen Resultaten"):
+    """Spread (name, value) fields over as many embeds as Discord's limits need.
+
+    Fields keep their order; each embed holds at most 25 of them and 6000
+    characters including its title. With more than one embed the titles
+    are numbered.
+    """
+    # Room for the title and a page number such as " (12/12)"
+    budget = MAX_EMBED_CHARACTERS - len(title) - len(" (999/999)")
+    pages = [[]]
+    size = 0
+    for name, value in fields:
+        name = name[:MAX_FIELD_NAME_LENGTH]
+        length = len(name) + len(value)
+        if pages[-1] and (len(pages[-1]) == MAX_EMBED_FIELDS or size + length > budget):
+            pages.append([])
+            size = 0
+        pages[-1].append((name, value))
+        size += length
+
+    embeds = []
+    for number, page in enumerate(pages, start=1):
+        if len(pages) > 1:
+            page_title = f"{title} ({number}/{len(pages)})"
+        else:
+            page_title = title
+        embed = discord.Embed(title=page_title, color=0x00FF00)
+        for name, value in page:
+            embed.add_field(name=name, value=value, inline=False)
+        embeds.append(embed)
+    return embeds
+
+
+def build_results_embed(nominee_votes, display_names, title="Verkiezingen Resultaten"):
+    """Render a tally as one embed: the top of the standings, highest first.
+
+    ``display_names`` maps nominee ids to names; nominees missing from it
+    (for example because they left the server) are shown by id. Nominees
+    beyond what fits in one embed are left out.
+    """
+    embed = build_results_embeds(result_fields(nominee_votes, display_names), title)[0]
+    embed.title = title
+    return embed
+
+
+async def send_embeds(channel, embeds):
+    """Send ``embeds`` in order, packing as many into each message as allowed."""
+    batch = []
+    size = 0
+    for embed in embeds:
+        # The 6000 character limit covers all embeds of a message together
+        full = len(batch) == MAX_MESSAGE_EMBEDS or size + len(embed) > MAX_EMBED_CHARACTERS
+        if batch and full:
+            await channel.send(embeds=batch)
+            batch = []
+            size = 0
+        batch.append(embed)
+        size += len(embed)
+    if batch:
+        await channel.send(embeds=batch)
+
+
+class LiveScoreboard:
+    """Keeps a posted message in step with the live tally during voting.
+
+    Edits are coalesced: at most one per ``interval`` seconds, never faster
+    than the channel edit rate limit allows, and skipped entirely when the
+    tally has not changed since the last edit. Counts come from the
+    in-memory tally, never from storage.
+    """
+
+    # Discord allows about five message edits per five seconds per channel
+    MIN_EDIT_INTERVAL = 1.0
+
+    def __init__(self, message, nomination, interval):
+        self.message = message
+        self.nomination = nomination
+        self.interval = max(interval, self.MIN_EDIT_INTERVAL)
+        self._rendered_version = None
+        self._task = None
+
+    def render(self):
+        nominee_votes = self.nomination.get_votes()
+        display_names = {
+            nominee_id: self.nomination.get_nominee_name(nominee_id)
+            for nominee_id in nominee_votes
+        }
+        return build_results_embed(
+            nominee_votes, display_names, title="Tussenstand (live)"
+        )
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
+
+    async def refresh(self):
+        version = self.nomination.tally_version
+        if version == self._rendered_version:
+            return
+        try:
+            await self.message.edit(embed=self.render())
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to update live results: {e}")
+            return
+        self._rendered_version = version
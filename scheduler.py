@@ -1,18 +1,87 @@
 import json
+import os
 from pathlib import Path
 import datetime
 
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from logutil import set_log_context
+
 SCHEDULE_FILE = Path("election_schedule.json")
+LEGACY_SCHEDULE_FILE = Path("last_election.txt")
+
+# Object whose coroutine methods run_job calls; set by the bot on startup
+_job_target = None
 
-def save_schedule(data):
-    with open(SCHEDULE_FILE, 'w') as f:
-        json.dump(data, f, default=str)
 
-def load_schedule():
+def save_schedule(data, directory="."):
+    # Write-then-rename so a crash never leaves a truncated schedule behind
+    schedule_file = Path(directory, SCHEDULE_FILE)
+    tmp_file = schedule_file.with_suffix(".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump({k: v.isoformat() for k, v in data.items()}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, schedule_file)
+
+def load_schedule(directory="."):
     try:
-        with open(SCHEDULE_FILE) as f:
+        with open(Path(directory, SCHEDULE_FILE)) as f:
             data = json.load(f)
             # Convert string dates back to datetime objects
             return {k: datetime.datetime.fromisoformat(v) for k, v in data.items()}
     except FileNotFoundError:
-        return {}
\ No newline at end of file
+        return _load_legacy_schedule(directory)
+    except ValueError:
+        return {}
+
+def _load_legacy_schedule(directory):
+    # last_election.txt held only the timestamp of the last nomination start
+    try:
+        with open(Path(directory, LEGACY_SCHEDULE_FILE)) as f:
+            last_timestamp = int(f.read().strip())
+            return {"last_election": datetime.datetime.fromtimestamp(last_timestamp)}
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def create_scheduler(jobstore_url, misfire_grace_time):
+    """Build the election scheduler.
+
+    With a job store URL, pending jobs live in that database and come back
+    on restart without being re-added. Jobs that were missed while the bot
+    was down run once (coalesced) as long as they are within
+    ``misfire_grace_time`` seconds of their run time; None means always.
+    """
+    return AsyncIOScheduler(
+        jobstores={"default": create_jobstore(jobstore_url)},
+        job_defaults={"coalesce": True, "misfire_grace_time": misfire_grace_time},
+    )
+
+def create_jobstore(jobstore_url, directory=None, tablename="apscheduler_jobs"):
+    """Job store at ``jobstore_url``, or in memory when it is empty.
+
+    With ``directory``, a relative SQLite database is placed in it, so a
+    guild's jobs stay with the rest of its files.
+    """
+    if not jobstore_url:
+        return MemoryJobStore()
+    sqlite_prefix = "sqlite:///"
+    if directory and jobstore_url.startswith(sqlite_prefix):
+        database = jobstore_url[len(sqlite_prefix):]
+        if not os.path.isabs(database):
+            jobstore_url = sqlite_prefix + os.path.join(directory, database)
+    return SQLAlchemyJobStore(url=jobstore_url, tablename=tablename)
+
+def set_job_target(target):
+    global _job_target
+    _job_target = target
+
+async def run_job(method_name, guild_id=None):
+    # Stored jobs reference this function by name, so they survive a restart.
+    # Jobs stored before elections were per guild have no guild id and run
+    # for the first configured guild.
+    election = _job_target.election(guild_id)
+    set_log_context(phase=method_name, guild=election.guild_id)
+    await getattr(election, method_name)()
@@ -8,10 +8,79 @@ load_dotenv()
 
 DISCORD_API_SECRET = os.getenv("DISCORD_TOKEN")
 
-GUILDS_ID = int(os.getenv("GUILD"))
-GUILD_ID_INT = int(os.getenv("GUILD"))
-DICTATOR_ROLE_ID = int(os.getenv("DICTATOR_ROLE_ID"))
-CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
+# The guild to run elections for, unless GUILD_CONFIG_FILE lists several
+GUILDS_ID = int(os.getenv("GUILD", "0"))
+GUILD_ID_INT = int(os.getenv("GUILD", "0"))
+DICTATOR_ROLE_ID = int(os.getenv("DICTATOR_ROLE_ID", "0"))
+CHANNEL_ID = int(os.getenv("CHANNEL_ID", "0"))
+
+# JSON list of {"guild_id", "channel_id", "dictator_role_id"} objects to run
+# elections for several guilds; each keeps its files in GUILD_DATA_DIR/<guild id>.
+# Unset runs one election for GUILD with its files in the working directory.
+GUILD_CONFIG_FILE = os.getenv("GUILD_CONFIG_FILE", "")
+GUILD_DATA_DIR = os.getenv("GUILD_DATA_DIR", "guilds")
+
+# SHARD_COUNT > 0 runs an AutoShardedBot; SHARD_IDS (comma separated) limits this
+# process to those shards and to the configured guilds on them
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+SHARD_IDS = [int(shard) for shard in os.getenv("SHARD_IDS", "").split(",") if shard.strip()] or None
+
+# Where nominees and votes are stored: "csv" (nominees.csv/votes.csv) or "sqlite";
+# with GUILD_CONFIG_FILE, SQLITE_PATH must be relative so each guild gets its own database
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "csv")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "elections.sqlite")
+
+# Lean mode: no presence intent and no full member cache; only nominees, this
+# cycle's voters and dictator-role holders are kept, others are fetched on demand
+LEAN_MEMBER_CACHE = os.getenv("LEAN_MEMBER_CACHE", "false").lower() in ("1", "true", "yes")
+
+# "fptp" for a single choice per voter, "ranked" for instant-runoff ranked ballots
+BALLOT_MODE = os.getenv("BALLOT_MODE", "fptp")
+
+# Post a live scoreboard next to the ballot, edited at most once per interval (seconds)
+LIVE_RESULTS = os.getenv("LIVE_RESULTS", "false").lower() in ("1", "true", "yes")
+LIVE_RESULTS_INTERVAL = float(os.getenv("LIVE_RESULTS_INTERVAL", "15"))
+
+# Vote changes within this many seconds are written to storage once, last choice kept
+VOTE_COALESCE_SECONDS = float(os.getenv("VOTE_COALESCE_SECONDS", "2"))
+# Per-voter limit on ballot changes: a burst of VOTE_RATE_BURST, then one change
+# per VOTE_RATE_INTERVAL seconds; 0 disables the limit
+VOTE_RATE_BURST = int(os.getenv("VOTE_RATE_BURST", "5"))
+VOTE_RATE_INTERVAL = float(os.getenv("VOTE_RATE_INTERVAL", "5"))
+
+# Archive each election's nominees and ballots to <guild data>/archive before clearing them
+ELECTION_ARCHIVE = os.getenv("ELECTION_ARCHIVE", "true").lower() in ("1", "true", "yes")
+
+# Maximum number of role add/remove calls in flight when announcing results
+ROLE_UPDATE_CONCURRENCY = int(os.getenv("ROLE_UPDATE_CONCURRENCY", "5"))
+
+# Sync slash commands on startup even when the command tree fingerprint is unchanged
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "false").lower() in ("1", "true", "yes")
+
+# Local HTTP server on http://METRICS_HOST:METRICS_PORT with Prometheus metrics on
+# /metrics and read-only election status JSON on /status and /status/<guild id>; 0 disables
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# APScheduler job store; pending election jobs survive restarts in this database.
+# An empty value keeps jobs in memory only.
+SCHEDULER_DB_URL = os.getenv("SCHEDULER_DB_URL", "sqlite:///jobs.sqlite")
+# Seconds a missed job may be late and still run on startup; unset runs it regardless
+SCHEDULER_MISFIRE_GRACE_TIME = (
+    int(os.getenv("SCHEDULER_MISFIRE_GRACE_TIME"))
+    if os.getenv("SCHEDULER_MISFIRE_GRACE_TIME")
+    else None
+)
+
+# How often the append-only vote journal is compacted to one row per voter
+VOTE_COMPACTION_MINUTES = int(os.getenv("VOTE_COMPACTION_MINUTES", "10"))
+
+
+# Log files rotate at midnight and whenever they exceed LOG_MAX_BYTES;
+# LOG_FILE_FORMAT "json" writes structured records with guild/election/phase/interaction
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "14"))
+LOG_FILE_FORMAT = "json" if os.getenv("LOG_FORMAT", "text") == "json" else "verbose"
 
 
 LOGGING_CONFIG = {
@@ -22,6 +91,7 @@ LOGGING_CONFIG = {
             "format": "%(levelname)-10s - %(asctime)s - %(module)-15s : %(message)s"
         },
         "standard": {"format": "%(levelname)-10s - %(name)-15s : %(message)s"},
+        "json": {"()": "logutil.JsonFormatter"},
     },
     "handlers": {
         "console": {
@@ -36,14 +106,17 @@ LOGGING_CONFIG = {
         },
         "file": {
             "level": "INFO",
-            "class": "logging.FileHandler",
+            "class": "logutil.SizedTimedRotatingFileHandler",
             "filename": "logs/infos.log",
-            "mode": "w",
-            "formatter": "verbose",
+            "when": "midnight",
+            "max_bytes": LOG_MAX_BYTES,
+            "backupCount": LOG_BACKUP_COUNT,
+            "encoding": "utf-8",
+            "formatter": LOG_FILE_FORMAT,
         },
     },
     "loggers": {
-        "bot": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "bot": {"handlers": ["console", "file"], "level": "INFO", "propagate": False},
         "discord": {
             "handlers": ["console2", "file"],
             "level": "INFO",
@@ -0,0 +1,88 @@
+"""Read-only election status, rendered into immutable snapshots.
+
+A snapshot is built once from an election's state and then served as-is
+until that state changes, so polling clients never touch storage or the
+Discord API. Snapshots carry a strong ETag; clients that send it back in
+If-None-Match get an empty 304.
+"""
+
+import functools
+import hashlib
+import json
+
+# The phase timestamps shown by /schedule, in order
+SCHEDULE_DATES = (
+    ("nomination_start", "Nominations Start"),
+    ("nomination_close", "Nominations Close"),
+    ("voting_start", "Voting Starts"),
+    ("voting_end", "Voting Ends"),
+)
+
+
+class StatusSnapshot:
+    """One rendered view of election state; never modified once built.
+
+    ``data`` is JSON-compatible, ``body`` its encoding and ``etag`` a hash
+    of the body, so the same state always yields the same ETag.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+    @functools.cached_property
+    def schedule_text(self):
+        return render_schedule(self.data["schedule"])
+
+
+def render_schedule(schedule):
+    """The /schedule message for a snapshot's ``schedule`` of Unix timestamps."""
+    schedule_text = "**Election Schedule**\n\n"
+
+    # Add scheduled events
+    for key, friendly_name in SCHEDULE_DATES:
+        if key in schedule:
+            timestamp = schedule[key]
+            schedule_text += f"📅 {friendly_name}: <t:{timestamp}:F> (<t:{timestamp}:R>)\n"
+
+    # Add next election info from schedule data
+    if "next_election" in schedule:
+        next_ts = schedule["next_election"]
+        schedule_text += (
+            f"\n🔄 Next election cycle starts: <t:{next_ts}:F> (<t:{next_ts}:R>)"
+        )
+    else:
+        schedule_text += "\n❌ No previous election data found"
+
+    if not any(key in schedule for key, _ in SCHEDULE_DATES):
+        schedule_text += "\n⚠️ No active election schedule"
+    return schedule_text
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # Weak comparison, as If-None-Match requires
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in ("*", etag):
+            return True
+    return False
+
+
+def snapshot_route(get_snapshot):
+    """A LocalHttpServer handler serving ``get_snapshot()`` as JSON."""
+
+    def handler(headers):
+        snapshot = get_snapshot()
+        # Clients may cache the body but must revalidate it on every poll
+        response_headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+        if etag_matches(headers.get("if-none-match"), snapshot.etag):
+            return 304, response_headers, b""
+        response_headers["Content-Type"] = "application/json; charset=utf-8"
+        return 200, response_headers, snapshot.body
+
+    return handler
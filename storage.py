@@ -0,0 +1,317 @@
+import csv
+import io
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+
+from votestore import VoteStore
+
+
+class Storage:
+    """Persistence backend behind Nomination.
+
+    Nomination keeps the live nominee index and vote tally in memory and
+    hands batches of (operation, rows) pairs to apply(), which runs them in
+    order from the writer thread.
+    """
+
+    # Whether superseded votes pile up on disk and need compact_votes()
+    journaled = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def apply(self, batch):
+        with self._lock:
+            for operation, rows in batch:
+                getattr(self, operation)(rows)
+
+    def load_nominations(self):
+        """Return (candidate_id, display_name) pairs in nomination order."""
+        raise NotImplementedError
+
+    def load_votes(self):
+        """Return (votes, superseded): a VoteStore and the superseded row count."""
+        raise NotImplementedError
+
+    def load_rankings(self):
+        """Return ({voter_id: (nominee_id, ...)}, superseded) for ranked ballots."""
+        raise NotImplementedError
+
+    def add_nominations(self, rows):
+        raise NotImplementedError
+
+    def add_votes(self, rows):
+        raise NotImplementedError
+
+    def add_rankings(self, rows):
+        raise NotImplementedError
+
+    def clear_nominations(self, rows=None):
+        raise NotImplementedError
+
+    def clear_votes(self, rows=None):
+        raise NotImplementedError
+
+    def compact_votes(self, votes):
+        pass
+
+    def compact_rankings(self, rows):
+        pass
+
+    def close(self):
+        pass
+
+
+class CsvStorage(Storage):
+    """nominees.csv plus votes.csv as an append-only journal.
+
+    The last journal row per voter wins; compact_votes() rewrites the journal
+    to one row per voter through a temporary file and an atomic rename, and
+    saves a binary VoteStore snapshot next to it. On load the snapshot is
+    mapped and only journal rows appended after it are parsed.
+    """
+
+    journaled = True
+
+    def __init__(
+        self,
+        nominees_path="nominees.csv",
+        votes_path="votes.csv",
+        rankings_path="rankings.csv",
+    ):
+        super().__init__()
+        self.nominees_path = nominees_path
+        self.votes_path = votes_path
+        self.snapshot_path = os.path.splitext(votes_path)[0] + '.bin'
+        # Ranked ballots: voter id followed by nominee ids, most preferred first;
+        # created by the first ranked ballot, so fptp elections never have one
+        self.rankings_path = rankings_path
+        self.check_and_create_file(self.nominees_path)
+        self.check_and_create_file(self.votes_path)
+
+    def check_and_create_file(self, file_path):
+        if not os.path.exists(file_path):
+            open(file_path, 'w').close()
+
+    def _read_rows(self, path):
+        with open(path, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            for row in reader:
+                if len(row) > 1:  # Ensure there are enough elements in the row
+                    yield row[0], row[1]
+
+    def _append_rows(self, path, rows):
+        with open(path, mode='a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerows(rows)
+
+    def load_nominations(self):
+        return list(self._read_rows(self.nominees_path))
+
+    def load_votes(self):
+        votes = self._load_snapshot()
+        if votes is None:
+            rows = list(self._read_rows(self.votes_path))
+            votes = VoteStore.from_rows(rows)
+            return votes, len(rows) - len(votes)
+
+        votes, journal_length = votes
+        # Rows appended since the snapshot; all of them count as superseded
+        # so the next compaction folds them into a fresh snapshot
+        with open(self.votes_path, mode='rb') as file:
+            file.seek(journal_length)
+            tail = file.read().decode()
+        entries = 0
+        for row in csv.reader(io.StringIO(tail, newline='')):
+            if len(row) > 1:
+                votes.set(int(row[0]), row[1])
+                entries += 1
+        return votes, entries
+
+    def _load_snapshot(self):
+        # Only a snapshot of exactly the journal's current prefix is usable
+        try:
+            votes, journal_length, journal_crc = VoteStore.load(self.snapshot_path)
+        except (FileNotFoundError, ValueError, struct.error):
+            # Missing, truncated or not a snapshot: parse the journal instead
+            return None
+        if os.path.getsize(self.votes_path) < journal_length:
+            return None
+        if self._journal_crc(journal_length) != journal_crc:
+            return None
+        return votes, journal_length
+
+    def _journal_crc(self, length):
+        crc = 0
+        with open(self.votes_path, mode='rb') as file:
+            while length > 0:
+                chunk = file.read(min(length, 1 << 20))
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                length -= len(chunk)
+        return crc
+
+    def load_rankings(self):
+        rankings = {}
+        entries = 0
+        if not os.path.exists(self.rankings_path):
+            return rankings, entries
+        with open(self.rankings_path, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            for row in reader:
+                if len(row) > 1:
+                    rankings[row[0]] = tuple(row[1:])
+                    entries += 1
+        return rankings, entries - len(rankings)
+
+    def add_nominations(self, rows):
+        self._append_rows(self.nominees_path, rows)
+
+    def add_votes(self, rows):
+        self._append_rows(self.votes_path, rows)
+
+    def add_rankings(self, rows):
+        self._append_rows(self.rankings_path, rows)
+
+    def clear_nominations(self, rows=None):
+        open(self.nominees_path, 'w').close()
+
+    def clear_votes(self, rows=None):
+        open(self.votes_path, 'w').close()
+        if os.path.exists(self.rankings_path):
+            open(self.rankings_path, 'w').close()
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+
+    def compact_votes(self, votes):
+        self._replace_rows(self.votes_path, votes.items())
+        # The snapshot goes in after the journal; if a crash separates the two,
+        # its crc no longer matches and the journal is parsed in full instead
+        journal_length = os.path.getsize(self.votes_path)
+        tmp_file = self.snapshot_path + '.tmp'
+        votes.save(tmp_file, journal_length, self._journal_crc(journal_length))
+        os.replace(tmp_file, self.snapshot_path)
+
+    def compact_rankings(self, rows):
+        self._replace_rows(self.rankings_path, rows)
+
+    def _replace_rows(self, path, rows):
+        # Written to a temporary file, fsynced and renamed over the journal,
+        # so a crash leaves either the old or the new journal, never a partial one
+        tmp_file = path + '.tmp'
+        with open(tmp_file, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerows(rows)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_file, path)
+
+
+class SqliteStorage(Storage):
+    """SQLite database in WAL mode.
+
+    Votes are keyed by a UNIQUE voter id and written with an UPSERT, so a
+    changed vote replaces the old row. The table is only read on startup,
+    into a VoteStore that keeps the tallies.
+    """
+
+    def __init__(self, path="elections.sqlite"):
+        super().__init__()
+        self.path = path
+        # The writer thread changes between flushes; access is serialised by _lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS nominees ("
+                "candidate_id TEXT PRIMARY KEY, display_name TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS votes ("
+                "voter_id TEXT NOT NULL UNIQUE, nominee_id TEXT NOT NULL)"
+            )
+            # Nothing queries by nominee any more; don't maintain the index on every UPSERT
+            self.connection.execute("DROP INDEX IF EXISTS votes_nominee")
+            # Nominee ids of a ranked ballot, space separated, most preferred first
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS rankings ("
+                "voter_id TEXT NOT NULL UNIQUE, ranking TEXT NOT NULL)"
+            )
+
+    def apply(self, batch):
+        # One transaction per flushed batch
+        with self._lock, self.connection:
+            for operation, rows in batch:
+                getattr(self, operation)(rows)
+
+    def load_nominations(self):
+        with self._lock:
+            return self.connection.execute(
+                "SELECT candidate_id, display_name FROM nominees ORDER BY rowid"
+            ).fetchall()
+
+    def load_votes(self):
+        with self._lock:
+            rows = self.connection.execute("SELECT voter_id, nominee_id FROM votes")
+            return VoteStore.from_rows(rows), 0
+
+    def load_rankings(self):
+        with self._lock:
+            rows = self.connection.execute("SELECT voter_id, ranking FROM rankings")
+            return {voter_id: tuple(ranking.split()) for voter_id, ranking in rows}, 0
+
+    def add_nominations(self, rows):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO nominees (candidate_id, display_name) VALUES (?, ?)",
+            rows,
+        )
+
+    def add_votes(self, rows):
+        self.connection.executemany(
+            "INSERT INTO votes (voter_id, nominee_id) VALUES (?, ?) "
+            "ON CONFLICT (voter_id) DO UPDATE SET nominee_id = excluded.nominee_id",
+            rows,
+        )
+
+    def add_rankings(self, rows):
+        self.connection.executemany(
+            "INSERT INTO rankings (voter_id, ranking) VALUES (?, ?) "
+            "ON CONFLICT (voter_id) DO UPDATE SET ranking = excluded.ranking",
+            [(row[0], " ".join(row[1:])) for row in rows],
+        )
+
+    def clear_nominations(self, rows=None):
+        self.connection.execute("DELETE FROM nominees")
+
+    def clear_votes(self, rows=None):
+        self.connection.execute("DELETE FROM votes")
+        self.connection.execute("DELETE FROM rankings")
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+def create_storage(backend, path=None, directory="."):
+    # Relative paths are inside ``directory``, which holds one guild's files;
+    # it is "." only for the single-guild setup without GUILD_CONFIG_FILE
+    if backend == "csv":
+        return CsvStorage(
+            os.path.join(directory, "nominees.csv"),
+            os.path.join(directory, "votes.csv"),
+            os.path.join(directory, "rankings.csv"),
+        )
+    if backend == "sqlite":
+        path = path or "elections.sqlite"
+        # The tables have no guild column, so guilds must not share a database
+        if os.path.isabs(path) and directory != ".":
+            raise ValueError(
+                f"SQLITE_PATH must be relative when running several guilds, not {path}"
+            )
+        return SqliteStorage(os.path.join(directory, path))
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,158 @@
+import numpy as np
+
+
+def rankings_matrix(rankings, candidate_ids):
+    """Pack ranked ballots into an int32 matrix of candidate indices.
+
+    ``rankings`` is an iterable of nominee-id sequences, most preferred
+    first; ``candidate_ids`` fixes the index of every nominee. Each row is
+    one ballot, padded with -1; ids not in ``candidate_ids`` are dropped.
+    """
+    index = {candidate_id: position for position, candidate_id in enumerate(candidate_ids)}
+    rows = [
+        [index[candidate_id] for candidate_id in ranking if candidate_id in index]
+        for ranking in rankings
+    ]
+    depth = max((len(row) for row in rows), default=0)
+    ballots = np.full((len(rows), max(depth, 1)), -1, dtype=np.int32)
+    for row_number, row in enumerate(rows):
+        ballots[row_number, : len(row)] = row
+    return ballots
+
+
+def plurality_winners(nominee_votes, eligible):
+    """Return ``(winner_ids, max_votes)`` of a single-choice tally.
+
+    Only nominees in ``eligible`` can win; every eligible nominee with the
+    highest count wins, in tally order.
+    """
+    winners = []
+    max_votes = 0
+    for nominee_id, votes in nominee_votes.items():
+        if nominee_id not in eligible:
+            continue
+        if votes > max_votes:
+            max_votes = votes
+            winners = [nominee_id]
+        elif votes == max_votes:
+            winners.append(nominee_id)
+    return winners, max_votes
+
+
+def result_fields(nominee_votes, display_names):
+    """(name, value) of each results embed field, highest vote count first.
+
+    ``display_names`` maps nominee ids to names; nominees missing from it
+    (for example because they left the server) are shown by id.
+    """
+    total_votes = sum(nominee_votes.values())
+    fields = []
+    for nominee_id, votes in sorted(
+        nominee_votes.items(), key=lambda item: item[1], reverse=True
+    ):
+        display_name = display_names.get(nominee_id) or f"Unknown Member ({nominee_id})"
+        percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        fields.append((display_name, f"Stemmen: {votes} ({percentage:.2f}%)"))
+    return fields
+
+
+def runoff_fields(rounds, candidate_ids, display_names):
+    """(name, value) of one embed field per instant-runoff round."""
+    fields = []
+    for number, round_info in enumerate(rounds, start=1):
+        standings = sorted(
+            (
+                (votes, candidate_ids[index])
+                for index, votes in enumerate(round_info["counts"])
+                if votes
+            ),
+            reverse=True,
+        )
+        lines = [
+            f"{display_names.get(nominee_id) or nominee_id}: {votes}"
+            for votes, nominee_id in standings
+        ]
+        if round_info["exhausted"]:
+            lines.append(f"Uitgeput: {round_info['exhausted']}")
+        if round_info["eliminated"] is not None:
+            eliminated = candidate_ids[round_info["eliminated"]]
+            lines.append(f"❌ {display_names.get(eliminated) or eliminated} valt af")
+        value = "\n".join(lines) or "Geen stemmen"
+        # Field values are capped at 1024 characters
+        if len(value) > 1024:
+            value = value[:1021] + "..."
+        fields.append((f"Ronde {number}", value))
+    return fields
+
+
+def instant_runoff(ballots, candidate_count, weights=None):
+    """Tally ranked ballots by instant runoff (single-winner STV).
+
+    Every round counts each ballot for its highest-ranked candidate still
+    in the race, all at once over the ballot matrix. A candidate with more
+    than half of the non-exhausted ballots wins. Otherwise the candidate
+    with the fewest votes is eliminated. A tie for last place goes to
+    whoever polled lower in the most recent round where they differed,
+    then to whoever was nominated later.
+    If every remaining candidate is tied, they all win (a draw).
+
+    ``weights`` optionally gives how many voters cast each row, so identical
+    ballots can be counted once.
+
+    Returns ``(winners, rounds)``: winner indices and, per round, a dict
+    with the vote ``counts`` per candidate, the number of ``exhausted``
+    ballots and the index ``eliminated`` afterwards (None in the last round).
+    """
+    ballots = np.asarray(ballots, dtype=np.int32)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.int64)
+    if candidate_count == 0:
+        return [], []
+    # Padding (-1) maps to an extra, permanently eliminated slot
+    ballots = np.where(ballots < 0, candidate_count, ballots)
+    eliminated = np.zeros(candidate_count + 1, dtype=bool)
+    eliminated[candidate_count] = True
+    rows = np.arange(len(ballots))
+    history = []
+    rounds = []
+
+    while True:
+        live = ~eliminated[ballots]
+        has_choice = live.any(axis=1)
+        choices = ballots[rows, live.argmax(axis=1)][has_choice]
+        if weights is None:
+            counts = np.bincount(choices, minlength=candidate_count + 1)
+            active_ballots = int(has_choice.sum())
+            total_ballots = len(ballots)
+        else:
+            counts = np.bincount(
+                choices, weights=weights[has_choice], minlength=candidate_count + 1
+            ).astype(np.int64)
+            active_ballots = int(weights[has_choice].sum())
+            total_ballots = int(weights.sum())
+        counts = counts[:candidate_count]
+        history.append(counts)
+
+        remaining = np.flatnonzero(~eliminated[:candidate_count])
+        remaining_counts = counts[remaining]
+        round_info = {
+            "counts": counts.tolist(),
+            "exhausted": total_ballots - active_ballots,
+            "eliminated": None,
+        }
+        rounds.append(round_info)
+
+        leader = remaining[remaining_counts.argmax()]
+        if len(remaining) == 1 or counts[leader] * 2 > active_ballots:
+            return [int(leader)], rounds
+        if (remaining_counts == remaining_counts[0]).all():
+            return remaining.tolist(), rounds
+
+        trailing = remaining[remaining_counts == remaining_counts.min()]
+        for earlier in reversed(history[:-1]):
+            if len(trailing) == 1:
+                break
+            trailing = trailing[earlier[trailing] == earlier[trailing].min()]
+        loser = int(trailing[-1])
+        eliminated[loser] = True
+        round_info["eliminated"] = loser
@@ -0,0 +1,94 @@
+import collections
+import random
+import unittest
+
+import numpy as np
+
+from tally import instant_runoff, rankings_matrix
+
+
+def matrix(*ballots):
+    depth = max(len(ballot) for ballot in ballots)
+    return np.array([list(ballot) + [-1] * (depth - len(ballot)) for ballot in ballots])
+
+
+def repeat(count, ballot):
+    return [ballot] * count
+
+
+class InstantRunoffTest(unittest.TestCase):
+    def test_first_round_majority(self):
+        winners, rounds = instant_runoff(matrix([0], [0], [1]), 2)
+        self.assertEqual(winners, [0])
+        self.assertEqual(rounds, [{"counts": [2, 1], "exhausted": 0, "eliminated": None}])
+
+    def test_exhausted_ballots_and_draw(self):
+        ballots = matrix(*repeat(4, [0]), *repeat(3, [1]), [2], [2, 1])
+        winners, rounds = instant_runoff(ballots, 3)
+        # 2 is eliminated; one of its ballots moves to 1, the other is exhausted,
+        # leaving 0 and 1 tied with no majority of the 8 live ballots
+        self.assertEqual(winners, [0, 1])
+        self.assertEqual(
+            rounds,
+            [
+                {"counts": [4, 3, 2], "exhausted": 0, "eliminated": 2},
+                {"counts": [4, 4, 0], "exhausted": 1, "eliminated": None},
+            ],
+        )
+
+    def test_last_place_tie_goes_to_earlier_rounds(self):
+        ballots = matrix(*repeat(5, [0]), *repeat(3, [1]), *repeat(2, [2]), [3, 2])
+        winners, rounds = instant_runoff(ballots, 4)
+        # 1 and 2 tie on 3 in round two; 2 polled lower in round one and goes
+        self.assertEqual(winners, [0])
+        self.assertEqual(
+            rounds,
+            [
+                {"counts": [5, 3, 2, 1], "exhausted": 0, "eliminated": 3},
+                {"counts": [5, 3, 3, 0], "exhausted": 0, "eliminated": 2},
+                {"counts": [5, 3, 0, 0], "exhausted": 3, "eliminated": None},
+            ],
+        )
+
+    def test_last_place_tie_without_history_eliminates_later_nominee(self):
+        ballots = matrix(*repeat(3, [0]), *repeat(2, [1]), *repeat(2, [2]))
+        winners, rounds = instant_runoff(ballots, 3)
+        self.assertEqual(winners, [0])
+        self.assertEqual(rounds[0]["eliminated"], 2)
+        self.assertEqual(rounds[1], {"counts": [3, 2, 0], "exhausted": 2, "eliminated": None})
+
+    def test_no_candidates(self):
+        self.assertEqual(instant_runoff(matrix([-1]), 0), ([], []))
+
+    def test_weighted_tally_matches_one_row_per_voter(self):
+        # recount.py counts identical ballots once with a weight; its rounds
+        # must equal the bot's, which tallies every ballot on its own
+        rng = random.Random(7)
+        candidate_ids = [str(n) for n in range(6)]
+        rankings = [
+            tuple(rng.sample(candidate_ids, rng.randint(1, 3))) for _ in range(2000)
+        ]
+        counts = collections.Counter(rankings)
+        distinct = list(counts)
+
+        expected = instant_runoff(rankings_matrix(rankings, candidate_ids), len(candidate_ids))
+        weighted = instant_runoff(
+            rankings_matrix(distinct, candidate_ids),
+            len(candidate_ids),
+            weights=[counts[ranking] for ranking in distinct],
+        )
+        self.assertEqual(weighted, expected)
+
+        # The hand-computed tie-break case as well
+        ballots = [(0,), (1,), (2,), (3, 2)]
+        weights = [5, 3, 2, 1]
+        self.assertEqual(
+            instant_runoff(matrix(*ballots), 4, weights=weights),
+            instant_runoff(
+                matrix(*(b for b, w in zip(ballots, weights) for _ in range(w))), 4
+            ),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
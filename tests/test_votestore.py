@@ -0,0 +1,159 @@
+import collections
+import os
+import random
+import tempfile
+import unittest
+
+from storage import CsvStorage
+from votestore import MIN_CAPACITY, VoteStore
+
+
+def tally(model):
+    return dict(collections.Counter(model.values()))
+
+
+class VoteStoreTest(unittest.TestCase):
+    def test_matches_dict_across_resizes(self):
+        rng = random.Random(3)
+        votes = VoteStore()
+        model = {}
+        # Enough voters for several doublings, with plenty of changed votes
+        for _ in range(20000):
+            voter_id = rng.randint(1, 6000) << rng.choice((0, 22))
+            nominee_id = str(rng.randint(1, 12))
+            self.assertEqual(votes.set(voter_id, nominee_id), model.get(voter_id))
+            model[voter_id] = nominee_id
+        self.assertGreater(votes._capacity, MIN_CAPACITY)
+        self.assertEqual(len(votes), len(model))
+        self.assertEqual(votes.tally(), tally(model))
+        for voter_id, nominee_id in model.items():
+            self.assertEqual(votes.get(voter_id), nominee_id)
+        self.assertIsNone(votes.get(7 << 40))
+        self.assertEqual(
+            dict(votes.items()), {str(v): n for v, n in model.items()}
+        )
+
+    def test_revote_for_same_nominee_keeps_counts(self):
+        votes = VoteStore()
+        votes.set(1, "a")
+        self.assertEqual(votes.set(1, "a"), "a")
+        self.assertEqual(votes.tally(), {"a": 1})
+
+    def test_rejects_invalid_voter_id(self):
+        with self.assertRaises(ValueError):
+            VoteStore().set(0, "a")
+
+    def test_copy_is_independent(self):
+        votes = VoteStore()
+        votes.set(1, "a")
+        copy = votes.copy()
+        votes.set(1, "b")
+        votes.set(2, "b")
+        self.assertEqual(copy.tally(), {"a": 1})
+        self.assertEqual(dict(copy.items()), {"1": "a"})
+
+    def test_from_rows_keeps_last_row_per_voter(self):
+        rows = [("1", "a"), ("2", "a"), ("1", "b"), ("3", "c"), ("2", "c"), ("1", "a")]
+        votes = VoteStore.from_rows(rows)
+        self.assertEqual(dict(votes.items()), {"1": "a", "2": "c", "3": "c"})
+        self.assertEqual(votes.tally(), {"a": 1, "c": 2})
+
+    def test_from_rows_large(self):
+        rng = random.Random(5)
+        rows = [(str(rng.randint(1, 3000)), str(rng.randint(1, 9))) for _ in range(10000)]
+        self.assertEqual(dict(VoteStore.from_rows(rows).items()), dict(rows))
+
+    def test_save_load_round_trip(self):
+        rng = random.Random(9)
+        votes = VoteStore()
+        for voter_id in range(1, 3000):
+            votes.set(voter_id * 7919, str(rng.randint(1, 30)))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "votes.bin")
+            votes.save(path, journal_length=1234, journal_crc=56)
+            with open(path, "rb") as f:
+                saved = f.read()
+
+            loaded, journal_length, journal_crc = VoteStore.load(path)
+            self.assertEqual((journal_length, journal_crc), (1234, 56))
+            self.assertEqual(len(loaded), len(votes))
+            self.assertEqual(loaded.tally(), votes.tally())
+            self.assertEqual(dict(loaded.items()), dict(votes.items()))
+
+            # Mapped copy-on-write: changes and resizes never reach the file
+            loaded.set(7919, "new")
+            for voter_id in range(1, 5000):
+                loaded.set(voter_id << 30, "x")
+            self.assertEqual(loaded.get(7919), "new")
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), saved)
+
+    def test_load_rejects_truncated_snapshot(self):
+        votes = VoteStore()
+        votes.set(1, "a")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "votes.bin")
+            votes.save(path)
+            with open(path, "r+b") as f:
+                f.truncate(os.path.getsize(path) - 1)
+            with self.assertRaises(ValueError):
+                VoteStore.load(path)
+
+
+class CsvSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def storage(self):
+        return CsvStorage(
+            os.path.join(self.directory, "nominees.csv"),
+            os.path.join(self.directory, "votes.csv"),
+            os.path.join(self.directory, "rankings.csv"),
+        )
+
+    def compacted(self, rows):
+        storage = self.storage()
+        storage.add_votes(rows)
+        storage.compact_votes(VoteStore.from_rows(rows))
+        return storage
+
+    def test_snapshot_plus_journal_tail(self):
+        storage = self.compacted([("1", "a"), ("2", "b"), ("1", "c")])
+        storage.add_votes([("3", "a"), ("2", "a")])
+        votes, superseded = self.storage().load_votes()
+        self.assertEqual(dict(votes.items()), {"1": "c", "2": "a", "3": "a"})
+        # Only the two rows after the snapshot were parsed
+        self.assertEqual(superseded, 2)
+
+    def test_truncated_snapshot_falls_back_to_journal(self):
+        storage = self.compacted([("1", "a"), ("2", "b")])
+        storage.add_votes([("2", "a")])
+        for size in (0, 5, 60):
+            with open(storage.snapshot_path, "r+b") as f:
+                f.truncate(size)
+            votes, _ = self.storage().load_votes()
+            self.assertEqual(dict(votes.items()), {"1": "a", "2": "a"})
+
+    def test_crc_mismatch_falls_back_to_journal(self):
+        storage = self.compacted([("1", "a"), ("2", "b")])
+        # Same length, different content: only the crc tells them apart
+        with open(storage.votes_path, "w", newline="") as f:
+            f.write("1,c\r\n2,d\r\n")
+        votes, superseded = self.storage().load_votes()
+        self.assertEqual(dict(votes.items()), {"1": "c", "2": "d"})
+        self.assertEqual(superseded, 0)
+
+    def test_shorter_journal_falls_back(self):
+        storage = self.compacted([("1", "a"), ("2", "b")])
+        with open(storage.votes_path, "w", newline="") as f:
+            f.write("1,b\r\n")
+        votes, _ = self.storage().load_votes()
+        self.assertEqual(dict(votes.items()), {"1": "b"})
+
+
+if __name__ == "__main__":
+    unittest.main()
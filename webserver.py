@@ -0,0 +1,80 @@
+import asyncio
+import logging
+
+logger = logging.getLogger("bot")
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class LocalHttpServer:
+    """Minimal HTTP/1.1 server for read-only local endpoints.
+
+    Each route maps a path to ``handler(headers) -> (status, headers, body)``,
+    where request header names are lower-cased and ``body`` is bytes.
+    Handlers run on the event loop, so they must not block.
+    """
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.routes = {}
+        self._server = None
+
+    def route(self, path, handler):
+        self.routes[path] = handler
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Serving {', '.join(self.routes)} on http://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=10)
+            headers = {}
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=10)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            except ValueError:
+                status, response_headers, body = 400, {}, b""
+            else:
+                handler = self.routes.get(target.split("?", 1)[0])
+                if handler is None:
+                    status, response_headers, body = 404, {}, b""
+                elif method not in ("GET", "HEAD"):
+                    status, response_headers, body = 405, {"Allow": "GET, HEAD"}, b""
+                else:
+                    status, response_headers, body = handler(headers)
+                if method == "HEAD":
+                    response_headers = {**response_headers, "Content-Length": str(len(body))}
+                    body = b""
+
+            head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+            response_headers.setdefault("Content-Length", str(len(body)))
+            response_headers["Connection"] = "close"
+            head += [f"{name}: {value}" for name, value in response_headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"HTTP handler error: {str(e)}", exc_info=True)
+        finally:
+            writer.close()